@@ -2,6 +2,11 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from extensions import init_neo4j, close_driver
+from schema import ensure_schema
+from instrumentation import init_instrumentation
+from metrics import init_metrics
+from compression import init_compression
+from transactions import init_bookmarks, BOOKMARKS_HEADER
 import atexit
 
 # Importar Blueprints
@@ -12,6 +17,8 @@ from routes.usuarios import usuarios_bp
 from routes.comentarios import comentarios_bp
 from routes.categoria_articulos import categoria_articulos_bp
 from routes.tag_articulos import tag_articulos_bp
+from routes.jobs import jobs_bp
+from routes.bootstrap import bootstrap_bp
 
 from URI import URI, USER, PASSWORD
 
@@ -26,7 +33,19 @@ app = Flask(__name__)
 #     }
 # })
 #opcion mas permisiva
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=[BOOKMARKS_HEADER, "ETag"])
+
+# Tiempos por petición: header Server-Timing y log de consultas lentas
+init_instrumentation(app)
+
+# Métricas por ruta en formato Prometheus (/metrics)
+init_metrics(app)
+
+# Bookmarks de Neo4j entre peticiones: lecturas consistentes con las escrituras del cliente
+init_bookmarks(app)
+
+# Compresión gzip / brotli / zstd según Accept-Encoding (incluye las respuestas NDJSON)
+init_compression(app)
 
 # --- 1. Inicializar Neo4j ---
 try:
@@ -36,6 +55,14 @@ try:
 except Exception as e:
     print(f"Error conectando a Neo4j: {e}")
 
+# Crear índices y restricciones que usan las rutas (idempotente).
+# Normalizar createdAt y calcular contadores faltantes es de una sola vez:
+# python loader.py --maintenance
+try:
+    ensure_schema()
+except Exception as e:
+    print(f"Error creando índices en Neo4j: {e}")
+
 # Asegurar que el driver se cierre cuando la app se apague
 atexit.register(close_driver)
 
@@ -47,6 +74,8 @@ app.register_blueprint(usuarios_bp, url_prefix='/api/usuarios')
 app.register_blueprint(comentarios_bp, url_prefix='/api/comentarios')
 app.register_blueprint(categoria_articulos_bp, url_prefix='/api/categoria')
 app.register_blueprint(tag_articulos_bp, url_prefix='/api/tag')
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+app.register_blueprint(bootstrap_bp, url_prefix='/api/bootstrap')
 
 # --- Endpoint de prueba simple para saber que pudimos conectarnos ---
 @app.route('/api/debug/connection')
@@ -59,5 +88,40 @@ def debug_connection():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# --- Estado del pool de conexiones (para dimensionarlo según workers e hilos) ---
+@app.route('/api/debug/pool')
+def debug_pool():
+    from extensions import pool_stats
+    return jsonify(pool_stats())
+
+# --- Índices que faltan en la base (deberían crearse al iniciar) ---
+@app.route('/api/debug/schema')
+def debug_schema():
+    from schema import missing_indexes
+    try:
+        return jsonify({"missing": missing_indexes()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# --- Estadísticas de las cachés (referencia, artículos, relacionados) y de las lecturas compartidas ---
+@app.route('/api/debug/cache')
+def debug_cache():
+    from cache import reference_cache, article_cache, related_cache, read_flights
+    return jsonify({
+        "reference": reference_cache.stats(),
+        "articulos": article_cache.stats(),
+        "relacionados": related_cache.stats(),
+        "single_flight": read_flights.stats()
+    })
+
+# --- Versión de cambios por recurso (la base de las ETag de los GET) ---
+@app.route('/api/debug/versions')
+def debug_versions():
+    from versions import stats
+    try:
+        return jsonify(stats())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == '__main__':
     app.run(port=5000, debug=True)
\ No newline at end of file
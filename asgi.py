@@ -0,0 +1,263 @@
+# asgi.py
+# Modo de servicio asíncrono: una app ASGI que atiende las lecturas más frecuentes
+# con el driver asyncio de Neo4j. Mientras una consulta espera a AuraDB el proceso
+# sigue atendiendo otras, así un solo worker mantiene cientos de consultas en curso
+# sin un hilo por petición.
+#
+# Uso (requiere un servidor ASGI, p. ej. pip install uvicorn):
+#   uvicorn asgi:app --workers 1
+#
+# Las rutas que no están aquí (escrituras, debug, /metrics...) se delegan a la app
+# Flask de app.py si asgiref está instalado (pip install asgiref); si no, responden 404.
+# Las métricas por ruta, el header Server-Timing, los GET condicionales (ETag, ver
+# versions.py), la compresión (compression.py) y las respuestas NDJSON solo existen en el
+# modo Flask: las peticiones NDJSON también se delegan (o responden 406 sin la app Flask).
+# Bookmarks: el driver asyncio comparte el bookmark manager del driver de Flask y las
+# lecturas respetan X-Neo4j-Bookmarks igual que en Flask (sin pasar por la caché).
+import contextvars
+import re
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from extensions import init_neo4j_async, get_async_driver, close_async_driver
+from transactions import BOOKMARKS_HEADER, parse_bookmarks, run_read_async
+from pagination import is_paginated, page_params, cypher_params, split_page
+from projection import select_fields
+from cache import reference_cache
+from serialization import NDJSON_MIMETYPE, serialize, record_to_dict, dumps
+from routes.articulos import (ARTICULO_FIELDS, ARTICULO_LIST_FIELDS, ARTICULOS_BY_ID_QUERY,
+                              COMMENT_COUNT_QUERY, parse_ids, cached_articulos,
+                              remember_articulos, articulos_query, comentarios_articulo_query)
+from routes.tags import TAGS_QUERY
+from routes.categorias import CATEGORIAS_QUERY, categoria_to_dict
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# (expresión de la ruta, handler); los grupos con nombre pasan como argumentos
+ROUTES = []
+
+
+def route(pattern):
+    def decorator(handler):
+        ROUTES.append((re.compile(f"^{pattern}$"), handler))
+        return handler
+    return decorator
+
+
+# Bookmarks que mandó el cliente en la petición actual (cada petición corre en su propia tarea)
+_client_bookmarks = contextvars.ContextVar('client_bookmarks', default=None)
+
+
+async def _read(query, **params):
+    config = {}
+    bookmarks = _client_bookmarks.get()
+    if bookmarks is not None:
+        # Solo para esta sesión, como en Flask: nunca se agregan al manager compartido
+        config['bookmarks'] = bookmarks
+    async with get_async_driver().session(**config) as session:
+        records, _ = await run_read_async(session, query, **params)
+    return records
+
+
+async def _articulos_by_id(ids):
+    """Como articulos_by_id de routes/articulos.py, con la misma caché"""
+    found, missing = cached_articulos(ids, bookmarks=_client_bookmarks.get() is not None)
+    if missing:
+        remember_articulos(await _read(ARTICULOS_BY_ID_QUERY, ids=missing), found)
+    return [found[articulo_id] for articulo_id in ids if articulo_id in found]
+
+
+# GET /api/articulos (mismos parámetros que la ruta Flask; NDJSON va a la app Flask)
+@route(r"/api/articulos/?")
+async def get_articulos(args):
+    try:
+        if 'ids' in args:
+            return await _articulos_by_id(parse_ids(args['ids']))
+        page = page_params(args)
+        fields = select_fields(args, ARTICULO_FIELDS, ARTICULO_LIST_FIELDS,
+                               required=("articulo_id", "created_at"))
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+    records = await _read(articulos_query(page, fields), **cypher_params(page))
+    articulos = [record_to_dict(record) for record in records]
+    if not is_paginated(args):
+        return articulos
+
+    articulos, next_cursor = split_page(articulos, page, "created_at", "articulo_id")
+    return {"articulos": articulos, "next_cursor": next_cursor}
+
+
+# GET /api/articulos/<id>
+@route(r"/api/articulos/(?P<id>\d+)")
+async def get_articulo(args, id):
+    articulos = await _articulos_by_id([int(id)])
+    if not articulos:
+        raise HTTPError(404, "Artículo no encontrado")
+    return articulos[0]
+
+
+# GET /api/articulos/<id>/comentarios
+@route(r"/api/articulos/(?P<id>\d+)/comentarios")
+async def get_comentarios_articulo(args, id):
+    id = int(id)
+    try:
+        page = page_params(args, always=True)
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+
+    records = await _read(comentarios_articulo_query(page), id=id, **cypher_params(page))
+    comentarios = [record_to_dict(record) for record in records]
+    comentarios, next_cursor = split_page(comentarios, page, "created_at", "_id")
+    total = await _read(COMMENT_COUNT_QUERY, id=id)
+    return {
+        "articulo_id": id,
+        "count": total[0]["total"] if total else 0,
+        "comentarios": comentarios,
+        "next_cursor": next_cursor,
+    }
+
+
+# GET /api/tags
+@route(r"/api/tags/?")
+async def get_tags(args):
+    return [serialize(record["t"]) for record in await _read(TAGS_QUERY)]
+
+
+# GET /api/categorias
+@route(r"/api/categorias/?")
+async def get_categorias(args):
+    return [categoria_to_dict(record) for record in await _read(CATEGORIAS_QUERY)]
+
+
+# Las rutas de datos de referencia comparten la caché (y sus llaves) con la app Flask
+CACHED_PREFIXES = {get_tags: 'tags:', get_categorias: 'categorias:'}
+
+# Rutas que en Flask también responden NDJSON; aquí solo JSON
+NDJSON_ROUTES = {get_articulos, get_comentarios_articulo}
+
+
+def _wants_ndjson(scope):
+    """Como serialization.wants_ndjson, a partir del scope ASGI"""
+    args = dict(parse_qsl(scope["query_string"].decode('utf-8'), keep_blank_values=True))
+    if args.get('format') == 'ndjson':
+        return True
+    accept = b",".join(value for name, value in scope["headers"] if name == b"accept")
+    mimetypes = parse_accept_header(accept.decode('latin-1'), MIMEAccept)
+    return mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+async def _send(send, status, body, content_type='application/json'):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode('latin-1')),
+            (b"content-length", str(len(body)).encode('latin-1')),
+            # Igual que CORS(app, resources={r"/api/*": {"origins": "*"}})
+            (b"access-control-allow-origin", b"*"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _lifespan(receive, send, uri, user, password):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            init_neo4j_async(uri, user, password)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_driver()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def create_app(uri=None, user=None, password=None, fallback=True):
+    """
+    Crea la app ASGI. Con fallback=True las rutas que no son asíncronas
+    se atienden con la app Flask (en hilos, por medio de asgiref).
+    """
+    if uri is None:
+        from URI import URI as uri, USER as user, PASSWORD as password
+
+    flask_app = None
+    if fallback and WsgiToAsgi is not None:
+        from app import app as wsgi_app
+        flask_app = WsgiToAsgi(wsgi_app)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await _lifespan(receive, send, uri, user, password)
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] == "GET":
+            for pattern, handler in ROUTES:
+                match = pattern.match(scope["path"])
+                if not match:
+                    continue
+                if handler in NDJSON_ROUTES and _wants_ndjson(scope):
+                    if flask_app is not None:
+                        return await flask_app(scope, receive, send)
+                    return await _send(send, 406, dumps({"error": "NDJSON no disponible en el modo asíncrono"}))
+                return await _handle(handler, match.groupdict(), scope, send, uri, user, password)
+
+        if flask_app is not None:
+            return await flask_app(scope, receive, send)
+        await _send(send, 404, dumps({"error": "Ruta no disponible en el modo asíncrono"}))
+
+    return app
+
+
+async def _handle(handler, kwargs, scope, send, uri, user, password):
+    # Servidores sin eventos 'lifespan': el driver se crea con la primera petición
+    if get_async_driver() is None:
+        init_neo4j_async(uri, user, password)
+
+    query_string = scope["query_string"].decode('utf-8')
+    args = dict(parse_qsl(query_string, keep_blank_values=True))
+
+    header = BOOKMARKS_HEADER.lower().encode('latin-1')
+    raw = b",".join(value for name, value in scope["headers"] if name == header)
+    bookmarks = None
+    if raw:
+        try:
+            bookmarks = parse_bookmarks(raw.decode('latin-1'))
+        except ValueError as e:
+            return await _send(send, 400, dumps({"error": str(e)}))
+    _client_bookmarks.set(bookmarks)
+
+    # Con bookmarks el cliente quiere ver su escritura: se lee de la base, no de la caché
+    prefix = CACHED_PREFIXES.get(handler) if bookmarks is None else None
+    if prefix is not None:
+        cached = reference_cache.get(prefix + query_string)
+        if cached is not None:
+            body, mimetype = cached
+            return await _send(send, 200, body, mimetype)
+
+    try:
+        body = dumps(await handler(args, **kwargs))
+    except HTTPError as e:
+        return await _send(send, e.status, dumps({"error": str(e)}))
+    except Exception as e:
+        return await _send(send, 500, dumps({"error": str(e)}))
+
+    if prefix is not None:
+        reference_cache.set(prefix + query_string, (body, 'application/json'))
+    await _send(send, 200, body)
+
+
+app = create_app()
@@ -0,0 +1,97 @@
+import os
+
+from transactions import run_write
+
+# Filas por transacción (UNWIND $rows) y máximo de elementos por petición
+DEFAULT_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', 500))
+MAX_BATCH_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 50000))
+
+
+def batch_args(request):
+    """
+    Lee el arreglo de elementos del cuerpo y el tamaño de lote (?chunk_size=).
+    Lanza ValueError si la petición no es válida.
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError("El cuerpo debe ser un arreglo JSON")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise ValueError(f"Máximo {MAX_BATCH_ITEMS} elementos por petición")
+
+    try:
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        raise ValueError("El parámetro 'chunk_size' debe ser un entero")
+    if chunk_size < 1:
+        raise ValueError("El parámetro 'chunk_size' debe ser mayor que 0")
+
+    return items, chunk_size
+
+
+def validate_items(items, validate, fields):
+    """
+    Aplica 'validate' (devuelve un mensaje de error o None) a cada elemento.
+    Devuelve (filas válidas con 'fields' y su 'index', resultados de error).
+    """
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        error = validate(item) if isinstance(item, dict) else "El elemento debe ser un objeto"
+        if error:
+            errors.append(error_result(index, error))
+        else:
+            row = {field: item.get(field) for field in fields}
+            row["index"] = index
+            rows.append(row)
+    return rows, errors
+
+
+def id_list_error(item, field):
+    """
+    Mensaje de error si item[field] no es una lista de ids enteros (o no está).
+    Un valor de otro tipo haría fallar el UNWIND de Cypher para todo el lote.
+    """
+    value = item.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(
+            isinstance(entry, int) and not isinstance(entry, bool) for entry in value):
+        return f"El campo '{field}' debe ser una lista de ids enteros"
+    return None
+
+
+def error_result(index, error):
+    return {"index": index, "status": "error", "error": error}
+
+
+def created_result(index, new_id):
+    return {"index": index, "status": "created", "id": new_id}
+
+
+def run_batch(session, query, rows, chunk_size, to_result, then=None):
+    """
+    Escribe las filas con UNWIND $rows, una transacción (con reintentos) por lote.
+    'to_result' convierte cada registro devuelto en el resultado del elemento.
+    'then' corre dentro de la transacción de cada lote (ver run_write).
+    Si un lote falla, sus elementos se reportan con error y se sigue con el siguiente.
+    """
+    results = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            records, _ = run_write(session, query, then=then, rows=chunk)
+        except Exception as e:
+            results.extend(error_result(row["index"], str(e)) for row in chunk)
+            continue
+        results.extend(to_result(record) for record in records)
+    return results
+
+
+def batch_response(results):
+    """Resumen y resultado por elemento, en el orden en que llegaron"""
+    results.sort(key=lambda result: result["index"])
+    created = sum(1 for result in results if result["status"] == "created")
+    return {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+    }
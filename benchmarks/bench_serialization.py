@@ -0,0 +1,98 @@
+"""
+Microbenchmark: serializador compartido (serialization.py) contra el helper
+serialize_neo4j_data que estaba copiado en cada blueprint.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_serialization.py [filas] [repeticiones]
+"""
+import json
+import os
+import sys
+import timeit
+
+from neo4j import Record
+from neo4j.time import DateTime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from serialization import record_to_dict, dumps, orjson  # noqa: E402
+
+
+def serialize_neo4j_data(data):
+    """Helper original, copiado tal cual de routes/articulos.py"""
+    if isinstance(data, dict):
+        return {key: serialize_neo4j_data(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [serialize_neo4j_data(item) for item in data]
+    elif hasattr(data, 'iso_format'):
+        return data.iso_format()
+    elif hasattr(data, 'to_native'):
+        return data.to_native()
+    else:
+        return data
+
+
+def make_records(n):
+    """Filas con la misma forma que devuelve la query de get_articulos"""
+    keys = ["articulo_id", "titulo", "content", "created_at",
+            "user_id", "user_name", "tags", "categories"]
+    records = []
+    for i in range(n):
+        values = [
+            i,
+            f"Artículo de prueba {i}",
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 10,
+            DateTime(2025, 1, 1 + i % 28, 10, i % 60, 0, 123456789),
+            i % 50,
+            f"Usuario {i % 50}",
+            [{"tname": "tecnologia"}, {"tname": "programacion"}],
+            [{"cname": "Tecnología"}],
+        ]
+        records.append(Record(zip(keys, values)))
+    return records
+
+
+def legacy(records):
+    articulos = []
+    for record in records:
+        articulo_serializado = serialize_neo4j_data(dict(record))
+        articulos.append({
+            "articulo_id": articulo_serializado["articulo_id"],
+            "user_id": articulo_serializado["user_id"],
+            "user_name": articulo_serializado["user_name"],
+            "titulo": articulo_serializado["titulo"],
+            "content": articulo_serializado["content"],
+            "tags": articulo_serializado["tags"] or [],
+            "categories": articulo_serializado["categories"] or [],
+            "created_at": articulo_serializado["created_at"]
+        })
+    # jsonify de Flask usa json.dumps de la librería estándar
+    return json.dumps(articulos).encode('utf-8')
+
+
+def shared(records):
+    return dumps([record_to_dict(record) for record in records])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    records = make_records(rows)
+
+    assert json.loads(legacy(records)) == json.loads(shared(records))
+
+    print(f"{rows} filas, mejor de {repeat} corridas "
+          f"(codificador: {'orjson' if orjson is not None else 'json'})")
+    results = {}
+    for name, func in (("serialize_neo4j_data + jsonify", legacy),
+                       ("serialization.record_to_dict + dumps", shared)):
+        best = min(timeit.repeat(lambda: func(records), number=1, repeat=repeat))
+        results[name] = best
+        print(f"  {name:<40} {best * 1000:8.1f} ms")
+
+    base, new = results.values()
+    print(f"  aceleración: {base / new:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Prueba de carga: modo Flask (síncrono) contra el modo ASGI (asgi.py).
+
+Abre N conexiones keep-alive y cada una repite GET sobre la URL durante D segundos.
+Reporta peticiones por segundo, errores y latencias (p50, p95, p99).
+Solo usa la librería estándar.
+
+Uso (desde la raíz del proyecto, contra la misma base):
+    # modo síncrono (un proceso, un hilo por petición)
+    python app.py
+    python benchmarks/load_test.py http://127.0.0.1:5000/api/articulos?limit=20 --label sync
+
+    # modo asíncrono (un proceso, un solo hilo de eventos)
+    uvicorn asgi:app --port 8000 --workers 1
+    python benchmarks/load_test.py http://127.0.0.1:8000/api/articulos?limit=20 --label async
+
+Para comparar conviene usar un URL que sí vaya a la base (no /api/tags, que sale de la caché)
+y subir --concurrency hasta ver dónde deja de crecer el throughput de cada modo.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def _request(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("conexión cerrada por el servidor")
+    status = int(status_line.split()[1])
+
+    length = None
+    keep_alive = not status_line.startswith(b"HTTP/1.0")
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection':
+            keep_alive = value != 'close'
+    if length is None:
+        raise ValueError("respuesta sin Content-Length")
+    await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _client(url, deadline, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            start = time.perf_counter()
+            status, keep_alive = await _request(reader, writer, parts.netloc, path)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors[status] = errors.get(status, 0) + 1
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, concurrency, duration):
+    latencies, errors = [], {}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(_client(url, deadline, latencies, errors) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def _percentile(values, fraction):
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('--concurrency', type=int, default=100, help="conexiones simultáneas")
+    parser.add_argument('--duration', type=float, default=20, help="segundos de prueba")
+    parser.add_argument('--label', default='', help="nombre del modo en el reporte")
+    args = parser.parse_args()
+
+    latencies, errors = asyncio.run(run(args.url, args.concurrency, args.duration))
+    latencies.sort()
+
+    print(f"{args.label or args.url}: concurrencia {args.concurrency}, {args.duration:.0f}s")
+    print(f"  {len(latencies) / args.duration:,.1f} peticiones/s, {len(latencies)} OK, errores: {errors or 0}")
+    if latencies:
+        print(f"  latencia p50 {_percentile(latencies, 0.50) * 1000:.1f} ms, "
+              f"p95 {_percentile(latencies, 0.95) * 1000:.1f} ms, "
+              f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms, "
+              f"media {statistics.mean(latencies) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
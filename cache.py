@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+from transactions import BOOKMARKS_HEADER
+
+
+class TTLCache:
+    """
+    Caché en memoria del proceso, acotada (LRU) y con expiración (TTL).
+    Cada worker tiene la suya; el TTL limita cuánto puede quedar desactualizada
+    una copia cuando la escritura ocurrió en otro worker.
+    """
+
+    def __init__(self, maxsize=128, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve el valor guardado o None si no existe o ya expiró"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, prefix=None):
+        """Elimina todas las llaves que empiezan con 'prefix' (o todas si es None)"""
+        with self._lock:
+            if prefix is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+# Datos de referencia (tags, categorías, usuarios): cambian muy poco
+reference_cache = TTLCache(
+    maxsize=int(os.environ.get('REFERENCE_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('REFERENCE_CACHE_TTL', 300)),
+)
+
+# Artículos individuales por id ('articulo:<id>' -> dict ya serializado).
+# Se invalidan al crear/borrar artículos y al cambiar tags, categorías o usuarios,
+# que aparecen dentro de cada artículo.
+article_cache = TTLCache(
+    maxsize=int(os.environ.get('ARTICLE_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('ARTICLE_CACHE_TTL', 60)),
+)
+
+# Artículos relacionados ('relacionados:<id>:<limit>' -> lista ya serializada).
+# Calcularlos recorre el vecindario del artículo; una recomendación algo vieja es aceptable.
+related_cache = TTLCache(
+    maxsize=int(os.environ.get('RELATED_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('RELATED_CACHE_TTL', 300)),
+)
+
+
+def cached_response(cache, prefix):
+    """
+    Decorador para endpoints GET: guarda el cuerpo de las respuestas 200
+    bajo '<prefix>' + query string. Los handlers de escritura deben llamar
+    a cache.invalidate(prefix) para descartar la copia.
+    Las peticiones con bookmarks (el cliente acaba de escribir, quizá en otro
+    worker) van a la base sin pasar por la caché, como en asgi.py y single_flight.
+    Las copias servidas desde la caché marcan g.cached_copy: pueden ser más viejas
+    que las versiones en memoria, así que @conditional no les pone validadores.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if BOOKMARKS_HEADER in request.headers:
+                return view(*args, **kwargs)
+
+            key = prefix + request.query_string.decode('utf-8')
+            cached = cache.get(key)
+            if cached is not None:
+                body, mimetype = cached
+                g.cached_copy = True
+                return Response(body, mimetype=mimetype)
+
+            response = view(*args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                cache.set(key, (response.get_data(), response.mimetype))
+            return response
+        return wrapper
+    return decorator
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas idénticas concurrentes: la primera con cada llave (la líder)
+    ejecuta la función y las que llegan mientras sigue en curso esperan su resultado
+    en lugar de repetirla. No guarda nada: al terminar, la siguiente llamada vuelve a ejecutar.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.shared = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Devuelve func(), o el resultado de la llamada en curso con la misma llave"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Lecturas en curso de las rutas con @single_flight
+read_flights = SingleFlight()
+
+
+def single_flight(view):
+    """
+    Decorador para endpoints GET costosos: las peticiones iguales (misma ruta, mismos
+    parámetros y mismo Accept) que llegan mientras otra se atiende comparten su consulta
+    y su cuerpo ya serializado. Va después de @conditional y antes de @cached_response.
+    No se comparten las respuestas transmitidas (NDJSON) ni las peticiones con bookmarks,
+    que deben ver escrituras que la consulta en curso quizá no vio.
+    @conditional, que corre antes, no suma lecturas a la estampida: usa las versiones
+    en memoria o, si el cliente revalida, todas comparten una sola lectura
+    (versions.current_versions).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if BOOKMARKS_HEADER in request.headers:
+            return view(*args, **kwargs)
+
+        led = []
+
+        def run():
+            led.append(True)
+            response = make_response(view(*args, **kwargs))
+            if response.is_streamed:
+                return response, None
+            return response, (response.get_data(), response.status_code, response.mimetype)
+
+        key = f"{request.endpoint}:{request.full_path}:{request.headers.get('Accept', '')}"
+        response, shared = read_flights.do(key, run)
+        if led:
+            return response
+
+        # Esta petición esperó a otra: recibe una copia del cuerpo (o, si la otra
+        # transmitió su respuesta, hace su propia consulta)
+        if shared is None:
+            return view(*args, **kwargs)
+        body, status, mimetype = shared
+        return Response(body, status=status, mimetype=mimetype)
+    return wrapper
@@ -0,0 +1,319 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify
+
+from extensions import get_driver
+from transactions import run_write
+from versions import bump
+
+# Nodos o relaciones que se borran por transacción
+BATCH_SIZE = int(os.environ.get('CASCADE_BATCH_SIZE', 1000))
+# Borrados en cascada que pueden correr a la vez (cada uno usa una conexión)
+WORKERS = int(os.environ.get('CASCADE_WORKERS', 2))
+# Trabajos que cada worker recuerda en memoria (los que él mismo corrió)
+MAX_JOBS = 1000
+# Segundos que se guarda en la base un trabajo terminado
+JOB_RETENTION = float(os.environ.get('CASCADE_JOB_RETENTION', 24 * 3600))
+# Cada cuántos segundos, como mucho, un worker borra los trabajos vencidos
+PURGE_INTERVAL = float(os.environ.get('CASCADE_PURGE_INTERVAL', 300))
+# Un trabajo sin terminar que no se guardó en este tiempo quedó huérfano
+# (se cayó el worker que lo corría); cada lote lo guarda y tarda mucho menos.
+# Un trabajo que espera en la cola más que esto también se informa así a los demás workers
+STALE_AFTER = float(os.environ.get('CASCADE_STALE_AFTER', 300))
+
+# Fragmentos comunes. Cada paso borra a lo más $batch elementos y devuelve cuántos borró;
+# se repite hasta que borra menos que eso. Los contadores (commentCount, articleCount)
+# se actualizan en la misma transacción que borra cada elemento.
+_DELETE_COMMENT = """
+CALL {
+    WITH k
+    MATCH (k)-[:ON_ARTICLE]->(a:Article)
+    SET a.commentCount = CASE WHEN coalesce(a.commentCount, 0) > 0 THEN a.commentCount - 1 ELSE 0 END
+}
+DETACH DELETE k
+RETURN count(*) AS deleted
+"""
+
+_DELETE_ARTICLE = """
+CALL {
+    WITH a
+    MATCH (a)-[:TAGGED_WITH]->(t:Tag)
+    SET t.articleCount = CASE WHEN coalesce(t.articleCount, 0) > 0 THEN t.articleCount - 1 ELSE 0 END
+}
+CALL {
+    WITH a
+    MATCH (a)-[:IN_CATEGORY]->(cat:Category)
+    SET cat.articleCount = CASE WHEN coalesce(cat.articleCount, 0) > 0 THEN cat.articleCount - 1 ELSE 0 END
+}
+DETACH DELETE a
+RETURN count(*) AS deleted
+"""
+
+# tipo -> [(nombre del paso, consulta)], en orden: primero los dependientes
+CASCADES = {
+    'usuario': [
+        ('comentarios', """
+            MATCH (:User {email: $email})-[:POSTED]->(k:Comment)
+            WITH k LIMIT $batch
+            """ + _DELETE_COMMENT),
+        ('comentarios_de_articulos', """
+            MATCH (:User {email: $email})-[:WROTE]->(:Article)<-[:ON_ARTICLE]-(k:Comment)
+            WITH k LIMIT $batch
+            """ + _DELETE_COMMENT),
+        ('articulos', """
+            MATCH (:User {email: $email})-[:WROTE]->(a:Article)
+            WITH a LIMIT $batch
+            """ + _DELETE_ARTICLE),
+        ('usuario', """
+            MATCH (u:User {email: $email})
+            DETACH DELETE u
+            RETURN count(*) AS deleted
+            """),
+    ],
+    'articulo': [
+        ('comentarios', """
+            MATCH (:Article {id: $id})<-[:ON_ARTICLE]-(k:Comment)
+            WITH k LIMIT $batch
+            """ + _DELETE_COMMENT),
+        ('articulo', """
+            MATCH (a:Article {id: $id})
+            """ + _DELETE_ARTICLE),
+    ],
+    'tag': [
+        ('relaciones', """
+            MATCH (:Tag {name: $name})<-[r:TAGGED_WITH]-()
+            WITH r LIMIT $batch
+            DELETE r
+            RETURN count(*) AS deleted
+            """),
+        ('tag', """
+            MATCH (t:Tag {name: $name})
+            DETACH DELETE t
+            RETURN count(*) AS deleted
+            """),
+    ],
+    'categoria': [
+        ('relaciones', """
+            MATCH (:Category {name: $name})<-[r:IN_CATEGORY]-()
+            WITH r LIMIT $batch
+            DELETE r
+            RETURN count(*) AS deleted
+            """),
+        ('categoria', """
+            MATCH (c:Category {name: $name})
+            DETACH DELETE c
+            RETURN count(*) AS deleted
+            """),
+    ],
+}
+
+
+# El estado de cada trabajo se guarda en un nodo :CascadeJob, actualizado en cada lote:
+# así cualquier worker puede responder /api/jobs/<id>, no solo el que recibió el DELETE.
+# 'target' y 'deleted' son mapas, que Neo4j no guarda como propiedad: van como JSON.
+# 'updatedAt' cambia con cada guardado; sirve para reconocer trabajos huérfanos.
+CREATE_JOB_QUERY = """
+CREATE (j:CascadeJob {id: $id, type: $type, target: $target, status: $status,
+                      deleted: $deleted, createdAt: $created_at, updatedAt: $updated_at})
+"""
+
+SAVE_JOB_QUERY = """
+MATCH (j:CascadeJob {id: $id})
+SET j.status = $status,
+    j.deleted = $deleted,
+    j.error = $error,
+    j.finishedAt = $finished_at,
+    j.updatedAt = $updated_at
+"""
+
+GET_JOB_QUERY = "MATCH (j:CascadeJob {id: $id}) RETURN j"
+
+# Usa el índice de CascadeJob.finishedAt (schema.py)
+PURGE_JOBS_QUERY = """
+MATCH (j:CascadeJob)
+WHERE j.finishedAt < $before
+WITH j LIMIT 1000
+DELETE j
+"""
+
+
+
+class Job:
+    """Estado de un borrado en cascada que corre en segundo plano"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'pending'
+        self.deleted = {}
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # El hilo de _run cambia el estado mientras /api/jobs lo lee
+        self.lock = threading.Lock()
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "job_id": self.id,
+                "type": self.kind,
+                "target": self.params,
+                "status": self.status,
+                "deleted": dict(self.deleted),
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+    def query_params(self):
+        """Parámetros de CREATE_JOB_QUERY / SAVE_JOB_QUERY"""
+        with self.lock:
+            return {
+                "id": self.id,
+                "type": self.kind,
+                "target": json.dumps(self.params, ensure_ascii=False),
+                "status": self.status,
+                "deleted": json.dumps(self.deleted),
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "updated_at": time.time(),
+            }
+
+    def update(self, **fields):
+        """Cambia varios campos del estado de una vez"""
+        with self.lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def count_deleted(self, step, deleted):
+        with self.lock:
+            self.deleted[step] = self.deleted.get(step, 0) + deleted
+
+
+def _job_from_node(node):
+    job = {
+        "job_id": node["id"],
+        "type": node["type"],
+        "target": json.loads(node["target"]),
+        "status": node["status"],
+        "deleted": json.loads(node["deleted"]),
+        "error": node.get("error"),
+        "created_at": node["createdAt"],
+        "finished_at": node.get("finishedAt"),
+    }
+    # Sin terminar y sin guardarse hace más de STALE_AFTER: el worker que lo corría
+    # se cayó (si siguiera vivo lo guardaría en cada lote). Se informa como fallido
+    # al leerlo, sin escribir nada
+    updated_at = node.get("updatedAt", node["createdAt"])
+    if job["status"] in ('pending', 'running') and time.time() - updated_at > STALE_AFTER:
+        job["status"] = 'failed'
+        job["error"] = 'El worker que corría el trabajo se detuvo antes de terminar'
+    return job
+
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='cascade')
+_jobs = OrderedDict()
+_lock = threading.Lock()
+# Última vez que este worker borró trabajos vencidos (ver _purge_jobs)
+_purged_at = 0.0
+
+
+def _purge_jobs(session):
+    """Borra los trabajos vencidos, como mucho una vez cada PURGE_INTERVAL segundos"""
+    global _purged_at
+    now = time.time()
+    with _lock:
+        if now - _purged_at < PURGE_INTERVAL:
+            return
+        _purged_at = now
+    run_write(session, PURGE_JOBS_QUERY, before=now - JOB_RETENTION)
+
+
+def get_job(job_id):
+    """
+    Estado del trabajo (como Job.as_dict) o None. El worker que lo corre lo tiene
+    en memoria; los demás lo leen del nodo :CascadeJob.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is not None:
+        return job.as_dict()
+
+    # Se lee como transacción de escritura para que vaya al líder: en un clúster,
+    # un seguidor podría no tener todavía el nodo recién creado
+    with get_driver().session() as session:
+        records, _ = run_write(session, GET_JOB_QUERY, id=job_id)
+    return _job_from_node(records[0]["j"]) if records else None
+
+
+def start_cascade(kind, on_done=None, resources=(), **params):
+    """
+    Registra el borrado en cascada de tipo 'kind' (ver CASCADES), lo encola y devuelve el Job.
+    El nodo :CascadeJob se crea antes de responder, así el estado se puede consultar
+    desde cualquier worker. 'on_done' se llama al terminar, haya fallado o no
+    (p. ej. para invalidar cachés). La versión de 'resources' (ver versions.py)
+    se incrementa en la transacción de cada lote.
+    """
+    job = Job(kind, params)
+    with get_driver().session() as session:
+        _purge_jobs(session)
+        run_write(session, CREATE_JOB_QUERY, **job.query_params())
+
+    with _lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+    _executor.submit(_run, job, CASCADES[kind], params, on_done, resources)
+    return job
+
+
+def _save(session, job):
+    """Guarda el estado del trabajo en su nodo :CascadeJob"""
+    run_write(session, SAVE_JOB_QUERY, **job.query_params())
+
+
+def _run(job, steps, params, on_done, resources):
+    job.update(status='running')
+    try:
+        with get_driver().session() as session:
+            try:
+                _save(session, job)
+                for name, query in steps:
+                    job.count_deleted(name, 0)
+                    while True:
+                        # Cada lote es su propia transacción administrada (con reintentos);
+                        # repetir un lote es seguro porque solo borra lo que todavía existe
+                        records, _ = run_write(session, query, then=bump(*resources),
+                                               batch=BATCH_SIZE, **params)
+                        deleted = records[0]["deleted"] if records else 0
+                        job.count_deleted(name, deleted)
+                        _save(session, job)
+                        if deleted < BATCH_SIZE:
+                            break
+                job.update(status='done', finished_at=time.time())
+            except Exception as e:
+                job.update(status='failed', error=str(e), finished_at=time.time())
+            _save(session, job)
+    except Exception as e:
+        # No se pudo guardar el estado final: al menos este worker lo conoce
+        job.update(status='failed', error=job.error or str(e),
+                   finished_at=job.finished_at or time.time())
+    finally:
+        if on_done:
+            on_done()
+
+
+def accepted(job):
+    """Respuesta 202 con el estado inicial del trabajo y dónde consultarlo"""
+    response = jsonify(job.as_dict())
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response
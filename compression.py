@@ -0,0 +1,148 @@
+# compression.py
+# Compresión de las respuestas negociada con Accept-Encoding.
+# gzip siempre está disponible; brotli (pip install brotli) y zstd (pip install zstandard)
+# se usan si están instalados y el cliente los acepta.
+#
+# Las respuestas normales se comprimen completas si pasan de COMPRESS_MIN_SIZE bytes.
+# Las que se transmiten (NDJSON) se comprimen por partes conforme se generan,
+# sin juntarlas en memoria: cada parte se vacía al cliente en cuanto está lista.
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Respuestas más chicas que esto (en bytes) se envían sin comprimir
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+# Niveles: más alto comprime más y cuesta más CPU por respuesta
+GZIP_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+ZSTD_LEVEL = int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3))
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/plain',
+    'text/html',
+    'text/css',
+}
+
+
+class GzipEncoder:
+    def __init__(self):
+        # wbits=31: formato gzip (encabezado y CRC), no zlib crudo
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Content-Encoding -> codificador, en orden de preferencia del servidor
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS['br'] = BrotliEncoder
+if zstandard is not None:
+    ENCODERS['zstd'] = ZstdEncoder
+ENCODERS['gzip'] = GzipEncoder
+
+
+def choose_encoding():
+    """La codificación preferida entre las que acepta el cliente, o None"""
+    return request.accept_encodings.best_match(list(ENCODERS))
+
+
+def _compressible(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if request.method == 'HEAD' or response.direct_passthrough:
+        return False
+    if 'Content-Encoding' in response.headers or response.cache_control.no_transform:
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def _compress_stream(chunks, encoder):
+    for chunk in chunks:
+        data = encoder.compress(chunk)
+        # Se vacía en cada parte para que el cliente reciba cada línea sin esperar al final
+        data += encoder.flush()
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+def compress_response(response):
+    """Comprime la respuesta si el cliente lo acepta y vale la pena"""
+    if not _compressible(response):
+        return response
+    # La representación depende de Accept-Encoding, incluso si esta vez no se comprime
+    response.vary.add('Accept-Encoding')
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    encoder = ENCODERS[encoding]()
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoder)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(encoder.compress(data) + encoder.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    """Registra el hook que comprime las respuestas"""
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response)
@@ -0,0 +1,67 @@
+from extensions import get_driver
+from transactions import run_write
+
+# Cada Tag y Category guarda en 'articleCount' cuántos artículos tiene,
+# y cada Article en 'commentCount' cuántos comentarios.
+# Las rutas lo mantienen en la misma transacción que crea o borra la relación:
+#   MERGE (a)-[:TAGGED_WITH]->(t) ON CREATE SET t.articleCount = ...  + 1
+# así un reintento de la transacción (la relación ya existe) no cuenta dos veces.
+# Esto solo recalcula el valor desde las relaciones: para los nodos que todavía
+# no lo tienen y después de una carga masiva (loader.py).
+#
+# Se recorre cada etiqueta por lotes de ids ($after, $batch), una transacción por lote,
+# así un recálculo sobre millones de nodos no es una sola transacción enorme.
+RECOUNT_QUERIES = {
+    'Tag': """
+    MATCH (t:Tag)
+    WHERE t.id > $after
+    WITH t ORDER BY t.id LIMIT $batch
+    CALL {
+        WITH t
+        WITH t WHERE NOT $only_missing OR t.articleCount IS NULL
+        SET t.articleCount = size([(a:Article)-[:TAGGED_WITH]->(t) | a])
+    }
+    RETURN max(t.id) AS last, count(*) AS scanned
+    """,
+    'Category': """
+    MATCH (c:Category)
+    WHERE c.id > $after
+    WITH c ORDER BY c.id LIMIT $batch
+    CALL {
+        WITH c
+        WITH c WHERE NOT $only_missing OR c.articleCount IS NULL
+        SET c.articleCount = size([(a:Article)-[:IN_CATEGORY]->(c) | a])
+    }
+    RETURN max(c.id) AS last, count(*) AS scanned
+    """,
+    'Article': """
+    MATCH (a:Article)
+    WHERE a.id > $after
+    WITH a ORDER BY a.id LIMIT $batch
+    CALL {
+        WITH a
+        WITH a WHERE NOT $only_missing OR a.commentCount IS NULL
+        SET a.commentCount = size([(k:Comment)-[:ON_ARTICLE]->(a) | k])
+    }
+    RETURN max(a.id) AS last, count(*) AS scanned
+    """,
+}
+
+
+def recount_article_counts(driver=None, only_missing=False, batch_size=10000):
+    """
+    Calcula 'articleCount' de tags y categorías y 'commentCount' de artículos
+    contando sus relaciones, de a 'batch_size' nodos por transacción.
+    Con only_missing=True solo toca los nodos que aún no tienen el contador.
+    """
+    driver = driver or get_driver()
+    with driver.session() as session:
+        for query in RECOUNT_QUERIES.values():
+            after = -1
+            while True:
+                records, _ = run_write(session, query, after=after, batch=batch_size,
+                                       only_missing=only_missing)
+                scanned = records[0]["scanned"] if records else 0
+                if scanned < batch_size:
+                    break
+                after = records[0]["last"]
@@ -1,15 +1,90 @@
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase
+from instrumentation import InstrumentedDriver
 import os
 
 driver = None
+# Driver asyncio del modo ASGI (asgi.py); el modo Flask no lo usa
+async_driver = None
+# Bookmarks compartidos por todas las sesiones del proceso (leer las propias escrituras)
+bookmark_manager = None
+
+# Opciones del driver que se pueden ajustar con variables de entorno.
+# Si la variable no existe se usa el valor por defecto del driver.
+DRIVER_CONFIG_ENV = {
+    "max_connection_pool_size": ("NEO4J_MAX_POOL_SIZE", int),
+    "connection_acquisition_timeout": ("NEO4J_ACQUISITION_TIMEOUT", float),
+    "max_connection_lifetime": ("NEO4J_MAX_CONNECTION_LIFETIME", float),
+    "connection_timeout": ("NEO4J_CONNECTION_TIMEOUT", float),
+    "liveness_check_timeout": ("NEO4J_LIVENESS_CHECK_TIMEOUT", float),
+    "fetch_size": ("NEO4J_FETCH_SIZE", int),
+}
+
+def driver_config_from_env():
+    config = {}
+    for option, (env_var, cast) in DRIVER_CONFIG_ENV.items():
+        value = os.environ.get(env_var)
+        if value is not None:
+            config[option] = cast(value)
+    return config
+
+def init_neo4j(uri, username, password, **config):
+    """Crea el driver; 'config' tiene prioridad sobre las variables de entorno"""
+    global driver, bookmark_manager
+    options = driver_config_from_env()
+    options.update(config)
+    bookmark_manager = options.setdefault('bookmark_manager', GraphDatabase.bookmark_manager())
+    # Las sesiones del driver registran tiempos y filas de cada consulta (instrumentation.py)
+    driver = InstrumentedDriver(GraphDatabase.driver(uri, auth=(username, password), **options))
 
-def init_neo4j(uri, username, password):
-    global driver
-    driver = GraphDatabase.driver(uri, auth=(username, password))
-    
 def get_driver():
     return driver
 
+def init_neo4j_async(uri, username, password, **config):
+    """Como init_neo4j, pero con el driver asyncio (sin instrumentación por petición)"""
+    global async_driver
+    options = driver_config_from_env()
+    options.update(config)
+    # Si el driver síncrono existe (asgi.py delega las escrituras a la app Flask) ambos
+    # comparten el bookmark manager: una lectura asíncrona ve las escrituras hechas por Flask.
+    # El driver asyncio acepta el manager síncrono (sus métodos no bloquean).
+    options.setdefault('bookmark_manager', bookmark_manager or AsyncGraphDatabase.bookmark_manager())
+    async_driver = AsyncGraphDatabase.driver(uri, auth=(username, password), **options)
+
+def get_async_driver():
+    return async_driver
+
+def pool_stats():
+    """
+    Estado del pool de conexiones por servidor: en uso, libres, abriéndose y
+    hilos esperando una conexión. El driver no expone estas cifras públicamente,
+    así que se leen de su pool interno.
+    """
+    if driver is None:
+        return {}
+
+    pool = driver._pool
+    config = pool.pool_config
+    stats = {
+        "max_size": config.max_connection_pool_size,
+        "acquisition_timeout": pool.workspace_config.connection_acquisition_timeout,
+        "max_connection_lifetime": config.max_connection_lifetime,
+        "waiters": len(getattr(pool.cond, "_waiters", ())),
+        "servers": {},
+    }
+    with pool.lock:
+        for address, connections in pool.connections.items():
+            in_use = sum(1 for connection in connections if connection.in_use)
+            stats["servers"][str(address)] = {
+                "in_use": in_use,
+                "idle": len(connections) - in_use,
+                "opening": pool.connections_reservations.get(address, 0),
+            }
+    return stats
+
 def close_driver():
     if driver:
-        driver.close()
\ No newline at end of file
+        driver.close()
+
+async def close_async_driver():
+    if async_driver:
+        await async_driver.close()
@@ -1,6 +1,20 @@
 // script-articulos-categoria.js (versión corregida)
 const API_BASE_URL = 'http://localhost:5000/api';
 
+// Bookmarks guardados por script.js después de una escritura (ver bookmarkHeaders allí):
+// se reenvían para leer lo recién escrito aunque la lectura caiga en otro worker
+function bookmarkHeaders() {
+    try {
+        const saved = JSON.parse(sessionStorage.getItem('neo4jBookmarks'));
+        if (saved && Date.now() - saved.savedAt < 5 * 60 * 1000) {
+            return { 'X-Neo4j-Bookmarks': saved.bookmarks };
+        }
+    } catch (e) {
+        // Valor dañado en sessionStorage: se ignora
+    }
+    return {};
+}
+
 function getQueryParam(param) {
     const urlParams = new URLSearchParams(window.location.search);
     return urlParams.get(param);
@@ -49,7 +63,7 @@ async function loadArticulosPorCategoria() {
     document.getElementById('titulo-categoria').textContent = `Artículos de: ${categoria}`;
     
     try {
-        const response = await fetch(`${API_BASE_URL}/categoria/${encodeURIComponent(categoria)}/articulos`);
+        const response = await fetch(`${API_BASE_URL}/categoria/${encodeURIComponent(categoria)}/articulos`, { headers: bookmarkHeaders() });
         if (!response.ok) {
             throw new Error('Error al cargar los artículos');
         }
@@ -2,6 +2,20 @@
 // Configuración de la API
 const API_BASE_URL = 'http://localhost:5000/api';
 
+// Bookmarks guardados por script.js después de una escritura (ver bookmarkHeaders allí):
+// se reenvían para leer lo recién escrito aunque la lectura caiga en otro worker
+function bookmarkHeaders() {
+    try {
+        const saved = JSON.parse(sessionStorage.getItem('neo4jBookmarks'));
+        if (saved && Date.now() - saved.savedAt < 5 * 60 * 1000) {
+            return { 'X-Neo4j-Bookmarks': saved.bookmarks };
+        }
+    } catch (e) {
+        // Valor dañado en sessionStorage: se ignora
+    }
+    return {};
+}
+
 // Función para obtener parámetros de la URL
 function getQueryParam(param) {
     const urlParams = new URLSearchParams(window.location.search);
@@ -54,7 +68,7 @@ async function loadArticulosPorTag() {
     document.getElementById('titulo-tag').textContent = `Artículos del tag: ${tag}`;
     
     try {  
-        const response = await fetch(`${API_BASE_URL}/tag/${encodeURIComponent(tag)}/articulos`);
+        const response = await fetch(`${API_BASE_URL}/tag/${encodeURIComponent(tag)}/articulos`, { headers: bookmarkHeaders() });
         if (!response.ok) {
             throw new Error('Error al cargar los artículos');
         }
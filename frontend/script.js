@@ -6,6 +6,36 @@ const selectedTags = new Set();
 // configurar path para las páginas, probando cosas...
 const path = window.location.pathname;
 
+// Bookmarks de Neo4j: el servidor los manda después de cada escritura y el cliente los
+// reenvía en las peticiones siguientes, así lee lo que acaba de escribir aunque la lectura
+// caiga en otro worker. Se guardan en sessionStorage para que sigan al cambiar de página
+// y se dejan de enviar pasado REFERENCE_CACHE_TTL del servidor (la caché más larga).
+const BOOKMARKS_HEADER = 'X-Neo4j-Bookmarks';
+const BOOKMARKS_KEY = 'neo4jBookmarks';
+const BOOKMARKS_MAX_AGE_MS = 5 * 60 * 1000;
+
+// Guarda los bookmarks que devolvió una escritura
+function rememberBookmarks(response) {
+    const bookmarks = response.headers.get(BOOKMARKS_HEADER);
+    if (bookmarks) {
+        sessionStorage.setItem(BOOKMARKS_KEY, JSON.stringify({ bookmarks, savedAt: Date.now() }));
+    }
+}
+
+// Headers con los últimos bookmarks guardados (vacío si no hay o ya vencieron)
+function bookmarkHeaders() {
+    try {
+        const saved = JSON.parse(sessionStorage.getItem(BOOKMARKS_KEY));
+        if (saved && Date.now() - saved.savedAt < BOOKMARKS_MAX_AGE_MS) {
+            return { [BOOKMARKS_HEADER]: saved.bookmarks };
+        }
+    } catch (e) {
+        // Valor dañado en sessionStorage: se ignora
+    }
+    sessionStorage.removeItem(BOOKMARKS_KEY);
+    return {};
+}
+
 
 // Función genérica para renderizar la lista
 // Función genérica para renderizar la lista
@@ -93,12 +123,14 @@ function showMessage(message, type = 'info') {
 async function apiCall(endpoint, options = {}) {
     try {
         const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
+                ...bookmarkHeaders(),
                 ...options.headers
-            },
-            ...options
+            }
         });
+        rememberBookmarks(response);
         
         if (!response.ok) {
             let errorMessage = 'Error en la petición';
@@ -124,10 +156,37 @@ async function apiCall(endpoint, options = {}) {
         throw error;
     }
 }
+// Los borrados en cascada responden 202 y corren en segundo plano:
+// se consulta /jobs/<job_id> hasta que el trabajo termina o se agota JOB_POLL_TIMEOUT_MS
+const JOB_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
+async function waitForJob(job) {
+    const deadline = Date.now() + JOB_POLL_TIMEOUT_MS;
+    while (job && (job.status === 'pending' || job.status === 'running')) {
+        if (Date.now() > deadline) {
+            const error = new Error('El borrado sigue en curso; revisa más tarde');
+            showMessage(error.message, 'error');
+            throw error;
+        }
+        await new Promise(resolve => setTimeout(resolve, 500));
+        job = await apiCall(`/jobs/${job.job_id}`);
+    }
+    if (job && job.status === 'failed') {
+        const error = new Error(job.error || 'Error al eliminar');
+        showMessage(error.message, 'error');
+        throw error;
+    }
+    return job;
+}
+
 // Funciones para obtener datos desde la API
-async function loadTags() {
+async function loadTags(tags = null) {
+    if (tags) {
+        renderSelectableList('tags-container', tags, selectedTags);
+        return;
+    }
     try {
-        const response = await fetch(`${API_BASE_URL}/tags/ids`);
+        const response = await fetch(`${API_BASE_URL}/tags/ids`, { headers: bookmarkHeaders() });
         console.log("Response status:", response.status);
         console.log("Response ok:", response.ok);
         
@@ -143,9 +202,13 @@ async function loadTags() {
     }
 }
 
-async function loadCategorias() {
+async function loadCategorias(categorias = null) {
+    if (categorias) {
+        renderSelectableList('categories-container', categorias, selectedCategories);
+        return;
+    }
     try {
-        const response = await fetch(`${API_BASE_URL}/categorias/ids`);
+        const response = await fetch(`${API_BASE_URL}/categorias/ids`, { headers: bookmarkHeaders() });
         console.log("Categorias response status:", response.status);
         
         const data = await response.json();
@@ -159,12 +222,85 @@ async function loadCategorias() {
     }
 }
 
+// Primer render de la página de artículos con una sola petición:
+// /api/bootstrap trae artículos, tags, categorías y usuarios juntos
+async function loadBootstrap() {
+    let data;
+    try {
+        data = await apiCall('/bootstrap');
+    } catch (error) {
+        console.error('Error en /bootstrap, se cargan los listados por separado:', error);
+        loadRealData();
+        loadTags();
+        loadCategorias();
+        return;
+    }
+    loadRealData(data);
+    loadTags(data.tags);
+    loadCategorias(data.categorias);
+}
+
+// Botón "Cargar más" justo después de 'anchor' mientras haya next_cursor;
+// al hacer clic llama a loadNext (que pide la siguiente página)
+function renderLoadMore(buttonId, anchor, nextCursor, loadNext) {
+    let button = document.getElementById(buttonId);
+    if (!nextCursor) {
+        if (button) button.remove();
+        return;
+    }
+    if (!button) {
+        button = document.createElement('button');
+        button.id = buttonId;
+        button.type = 'button';
+        button.className = 'btn btn-secondary btn-sm load-more';
+        button.textContent = 'Cargar más';
+        anchor.insertAdjacentElement('afterend', button);
+    }
+    button.disabled = false;
+    button.onclick = async () => {
+        button.disabled = true;
+        try {
+            await loadNext();
+        } catch (error) {
+            console.error('Error al cargar la siguiente página:', error);
+            button.disabled = false;
+        }
+    };
+}
+
+// Comentarios de comentarios.html por páginas: 'after' es el next_cursor de la anterior
+async function loadComentariosPage(after = null) {
+    const data = await apiCall(after ? `/comentarios?after=${encodeURIComponent(after)}` : '/comentarios');
+    const tbody = document.querySelector('#comments-table tbody');
+    if (!after) {
+        tbody.innerHTML = '';
+    }
+    
+    data.comentarios.forEach(comentario => {
+        const tr = document.createElement('tr');
+        tr.innerHTML = `
+            <td>${comentario._id}</td>
+            <td>${comentario.article_title} (ID: ${comentario.article_id})</td>
+            <td>${comentario.user_name} (ID: ${comentario.user_id})</td>
+            <td>${comentario.comment}</td>
+            <td class="action-buttons">
+                <button class="btn btn-danger btn-sm" onclick="deleteComment(${comentario._id})">Eliminar</button>
+            </td>
+        `;
+        tbody.appendChild(tr);
+    });
+    
+    renderLoadMore('comments-load-more', document.getElementById('comments-table'),
+                   data.next_cursor, () => loadComentariosPage(data.next_cursor));
+}
+
 // Función para cargar datos reales desde la API
-async function loadRealData() {
+// 'bootstrap' (opcional) son los datos ya leídos de /api/bootstrap
+async function loadRealData(bootstrap = null) {
     try {
         // Cargar artículos
         if (path.includes("articulos.html")) {
-            const articulos = await apiCall('/articulos');
+            const articulos = bootstrap ? bootstrap.articulos : await apiCall('/articulos');
             const tbody = document.querySelector('#articles-table tbody');
             tbody.innerHTML = '';
             
@@ -191,7 +327,7 @@ async function loadRealData() {
                     <td>
                         <strong>${articulo.titulo}</strong>
                         <div class="article-details">
-                            ${articulo.content ? articulo.content.substring(0, 100) + (articulo.content.length > 100 ? '...' : '') : 'Sin contenido'}
+                            ${articulo.excerpt || 'Sin contenido'}
                         </div>
                         <div class="comments-section">
                             <button class="comments-toggle" onclick="toggleComments(${articulo.articulo_id})">
@@ -239,25 +375,9 @@ async function loadRealData() {
             });
         }
         
-        // Cargar comentarios
+        // Cargar comentarios (primera página; el resto con "Cargar más")
         if (path.includes("comentarios.html")) {
-            const comentarios = await apiCall('/comentarios');
-            const tbody = document.querySelector('#comments-table tbody');
-            tbody.innerHTML = '';
-            
-            comentarios.forEach(comentario => {
-                const tr = document.createElement('tr');
-                tr.innerHTML = `
-                    <td>${comentario._id}</td>
-                    <td>${comentario.article_title} (ID: ${comentario.article_id})</td>
-                    <td>${comentario.user_name} (ID: ${comentario.user_id})</td>
-                    <td>${comentario.comment}</td>
-                    <td class="action-buttons">
-                        <button class="btn btn-danger btn-sm" onclick="deleteComment(${comentario._id})">Eliminar</button>
-                    </td>
-                `;
-                tbody.appendChild(tr);
-            });
+            await loadComentariosPage();
         }
         
         // Cargar tags (sin cambios)
@@ -287,7 +407,7 @@ async function loadRealData() {
         
         // Cargar usuarios (sin cambios)
         if (path.includes("usuarios.html")) {
-            const usuarios = await apiCall('/usuarios');
+            const usuarios = bootstrap ? bootstrap.usuarios : await apiCall('/usuarios');
             const tbody = document.querySelector('#users-table tbody');
             tbody.innerHTML = '';
             
@@ -314,7 +434,7 @@ async function loadRealData() {
 async function deleteArticle(id) {
     if (confirm('¿Estás seguro de que deseas eliminar este artículo?')) {
         try {
-            await apiCall(`/articulos/${id}`, { method: 'DELETE' });
+            await waitForJob(await apiCall(`/articulos/${id}`, { method: 'DELETE' }));
             showMessage('Artículo eliminado correctamente', 'success');
             loadRealData();
         } catch (error) {
@@ -334,7 +454,7 @@ function editCategory(name, url) {
 async function deleteCategory(name) {
     if (confirm('¿Estás seguro de que deseas eliminar esta categoría?')) {
         try {
-            await apiCall(`/categorias/${encodeURIComponent(name)}`, { method: 'DELETE' });
+            await waitForJob(await apiCall(`/categorias/${encodeURIComponent(name)}`, { method: 'DELETE' }));
             showMessage('Categoría eliminada correctamente', 'success');
             loadRealData();
         } catch (error) {}
@@ -365,7 +485,7 @@ function editTag(name, url) {
 async function deleteTag(name) {
     if (confirm('¿Estás seguro de que deseas eliminar este tag?')) {
         try {
-            await apiCall(`/tags/${encodeURIComponent(name)}`, { method: 'DELETE' });
+            await waitForJob(await apiCall(`/tags/${encodeURIComponent(name)}`, { method: 'DELETE' }));
             showMessage('Tag eliminado correctamente', 'success');
             loadRealData();
         } catch (error) {}
@@ -385,7 +505,7 @@ function editUser(email, name, newEmail) {
 async function deleteUser(email) {
     if (confirm('¿Estás seguro de que deseas eliminar este usuario?')) {
         try {
-            await apiCall(`/usuarios/${encodeURIComponent(email)}`, { method: 'DELETE' });
+            await waitForJob(await apiCall(`/usuarios/${encodeURIComponent(email)}`, { method: 'DELETE' }));
             showMessage('Usuario eliminado correctamente', 'success');
             loadRealData();
         } catch (error) {}
@@ -394,13 +514,13 @@ async function deleteUser(email) {
 
 // Configuración de formularios
 document.addEventListener('DOMContentLoaded', function() {
-    loadRealData();
     const tagsContainer = document.getElementById('tags-container');
     const categoriesContainer = document.getElementById('categories-container');
 
     if (tagsContainer && categoriesContainer) {
-        loadTags();
-        loadCategorias();
+        loadBootstrap();
+    } else {
+        loadRealData();
     }
     
     const cancelButtons = document.querySelectorAll('#cancel-edit');
@@ -0,0 +1,116 @@
+import os
+import threading
+
+from neo4j.exceptions import ConstraintError
+
+from transactions import run_write
+
+# Cantidad de IDs que cada proceso reserva de una sola vez
+BLOCK_SIZE = int(os.environ.get('ID_BLOCK_SIZE', 50))
+
+# Etiquetas que usan el asignador (se interpolan en Cypher, por eso la lista cerrada)
+LABELS = ('User', 'Tag', 'Category', 'Article', 'Comment')
+
+# Un candado por etiqueta: mientras una etiqueta recarga su bloque en la base
+# (con los reintentos del driver), las creaciones de las demás no esperan
+_locks = {label: threading.Lock() for label in LABELS}
+# etiqueta -> [siguiente id libre, fin del bloque (exclusivo)]
+_blocks = {}
+
+# Reserva un rango de IDs en el nodo contador de la etiqueta.
+# - La primera vez se inicializa con max(id) + 1, así se respetan los datos existentes.
+# - SET c._lock toma el candado de escritura antes de leer c.next,
+#   de modo que dos workers nunca reciben el mismo rango.
+RESERVE_QUERY = """
+MERGE (c:IdCounter {{label: $label}})
+SET c._lock = true
+WITH c
+CALL {{
+    WITH c
+    WITH c WHERE c.next IS NULL
+    OPTIONAL MATCH (n:{label})
+    WITH c, coalesce(max(n.id), 0) + 1 AS seed
+    SET c.next = seed
+}}
+WITH c, c.next AS start
+SET c.next = start + $block
+REMOVE c._lock
+RETURN start
+"""
+
+
+def reserve_block(session, label, size=BLOCK_SIZE):
+    """Reserva 'size' IDs consecutivos en la base y devuelve el primero"""
+    if label not in LABELS:
+        raise ValueError(f"Etiqueta no soportada por el asignador de IDs: {label}")
+    query = RESERVE_QUERY.format(label=label)
+    records, _ = run_write(session, query, label=label, block=size)
+    return records[0]["start"]
+
+
+def next_id(session, label):
+    """
+    Devuelve el siguiente ID para la etiqueta.
+    Solo va a la base cuando el bloque reservado por este proceso se agota.
+    """
+    if label not in LABELS:
+        raise ValueError(f"Etiqueta no soportada por el asignador de IDs: {label}")
+    with _locks[label]:
+        block = _blocks.get(label)
+        if block is None or block[0] >= block[1]:
+            start = reserve_block(session, label)
+            block = [start, start + BLOCK_SIZE]
+            _blocks[label] = block
+
+        new_id = block[0]
+        block[0] += 1
+        return new_id
+
+
+def discard_block(label):
+    """Descarta el bloque reservado por este proceso: el próximo next_id reserva otro"""
+    with _locks[label]:
+        _blocks.pop(label, None)
+
+
+def create_with_id(session, label, create):
+    """
+    Llama a create(id) con el siguiente ID de la etiqueta y devuelve su resultado.
+    Si el ID ya lo tiene otro nodo (la restricción de unicidad de schema.py lo rechaza),
+    el bloque de este proceso quedó viejo: p. ej. loader.py cargó IDs explícitos y
+    adelantó el contador después de que lo reservamos. Se descarta el bloque,
+    se reserva uno nuevo (ya por encima de esos IDs) y se reintenta una vez.
+    """
+    try:
+        return create(next_id(session, label))
+    except ConstraintError:
+        discard_block(label)
+        return create(next_id(session, label))
+
+
+def allocate_ids(session, label, count):
+    """Reserva un bloque exclusivo de 'count' IDs (para cargas por lotes) y los devuelve"""
+    if count <= 0:
+        return []
+    start = reserve_block(session, label, size=count)
+    return list(range(start, start + count))
+
+
+# Después de una carga con IDs explícitos (loader.py) el contador puede quedar
+# por debajo de los IDs nuevos; se adelanta para que la API no los repita.
+# Si el contador aún no existe no hace falta: se inicializa con max(id) + 1.
+# Los bloques que los workers ya tenían reservados no se enteran: el primer
+# ID repetido choca con la restricción de unicidad y create_with_id descarta
+# el bloque y reserva otro a partir del contador adelantado.
+ADVANCE_QUERY = """
+MATCH (c:IdCounter {label: $label})
+WHERE c.next <= $max_id
+SET c.next = $max_id + 1
+"""
+
+
+def advance_counter(session, label, max_id):
+    """Garantiza que el contador de la etiqueta entregue IDs mayores que 'max_id'"""
+    if label not in LABELS:
+        raise ValueError(f"Etiqueta no soportada por el asignador de IDs: {label}")
+    run_write(session, ADVANCE_QUERY, label=label, max_id=max_id)
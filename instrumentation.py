@@ -0,0 +1,233 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from functools import wraps
+
+from flask import g, has_request_context, request
+
+# Consultas más lentas que esto (en ms, dentro del driver) se escriben en el log de consultas lentas
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+
+slow_query_log = logging.getLogger('slow_query')
+
+
+def query_hash(query):
+    """Hash corto del texto Cypher, para agrupar consultas sin guardar el texto completo"""
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()[:12]
+
+
+def params_shape(params):
+    """Nombre y tipo de cada parámetro (sin los valores)"""
+    shape = {}
+    for key, value in (params or {}).items():
+        if isinstance(value, (list, tuple)):
+            shape[key] = f"list[{len(value)}]"
+        else:
+            shape[key] = type(value).__name__
+    return shape
+
+
+class QueryStats:
+    """Métricas de una ejecución de session.run"""
+
+    def __init__(self, query, params):
+        self.query = query
+        self.hash = query_hash(query)
+        self.params = params_shape(params)
+        self.rows = 0
+        # Tiempo de pared esperando al driver (run + obtener registros), en segundos
+        self.db_time = 0.0
+        self.available_after = None
+        self.consumed_after = None
+        self.finished = False
+
+    def finish(self, summary):
+        if self.finished:
+            return
+        self.finished = True
+        if summary is not None:
+            self.available_after = summary.result_available_after
+            self.consumed_after = summary.result_consumed_after
+        # Una sola vez, cuando ya se leyeron todos sus registros
+        if self.db_time * 1000 >= SLOW_QUERY_MS:
+            slow_query_log.warning(json.dumps(self.as_dict()))
+
+    def as_dict(self):
+        return {
+            "endpoint": request.endpoint if has_request_context() else None,
+            "query_hash": self.hash,
+            "params": self.params,
+            "rows": self.rows,
+            "db_ms": round(self.db_time * 1000, 2),
+            "result_available_after": self.available_after,
+            "result_consumed_after": self.consumed_after,
+        }
+
+
+def timed_serialization(func):
+    """
+    Decorador para record_to_dict y dumps: suma su tiempo al de serialización de la
+    petición, que va en su propia entrada de Server-Timing. No se asigna a ninguna
+    consulta: la última en correr no es necesariamente la que produjo los registros
+    (p. ej. el conteo que va después de la página).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not has_request_context():
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            g.serialize_time = g.get('serialize_time', 0.0) + time.perf_counter() - start
+    return wrapper
+
+
+class InstrumentedResult:
+    """Envuelve un Result para contar filas y medir el tiempo dentro del driver"""
+
+    def __init__(self, result, stats):
+        self._result = result
+        self._stats = stats
+
+    def _timed(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._stats.db_time += time.perf_counter() - start
+
+    def __iter__(self):
+        iterator = iter(self._result)
+        while True:
+            try:
+                record = self._timed(next, iterator)
+            except StopIteration:
+                break
+            self._stats.rows += 1
+            yield record
+        self.consume()
+
+    def single(self, *args, **kwargs):
+        record = self._timed(self._result.single, *args, **kwargs)
+        self._stats.rows += int(record is not None)
+        self.consume()
+        return record
+
+    def consume(self):
+        summary = self._timed(self._result.consume)
+        self._stats.finish(summary)
+        return summary
+
+    def __getattr__(self, name):
+        return getattr(self._result, name)
+
+
+def _instrumented_run(runner, query, parameters, kwargs):
+    """Ejecuta runner.run (sesión o transacción) registrando sus métricas"""
+    params = dict(parameters or {}, **kwargs)
+    stats = QueryStats(query, params)
+    if has_request_context():
+        g.setdefault('queries', []).append(stats)
+
+    start = time.perf_counter()
+    result = runner.run(query, parameters, **kwargs)
+    stats.db_time += time.perf_counter() - start
+    return InstrumentedResult(result, stats)
+
+
+class InstrumentedTransaction:
+    """Transacción administrada cuyo run() también se mide"""
+
+    def __init__(self, tx):
+        self._tx = tx
+
+    def run(self, query, parameters=None, **kwargs):
+        return _instrumented_run(self._tx, query, parameters, kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._tx, name)
+
+
+class InstrumentedSession:
+    """Sesión cuyo run() y funciones de transacción registran sus métricas en la petición actual"""
+
+    def __init__(self, session):
+        self._session = session
+
+    def run(self, query, parameters=None, **kwargs):
+        return _instrumented_run(self._session, query, parameters, kwargs)
+
+    def execute_write(self, transaction_function, *args, **kwargs):
+        return self._session.execute_write(
+            _wrap_transaction_function(transaction_function), *args, **kwargs)
+
+    def execute_read(self, transaction_function, *args, **kwargs):
+        return self._session.execute_read(
+            _wrap_transaction_function(transaction_function), *args, **kwargs)
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._session.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def _wrap_transaction_function(transaction_function):
+    def wrapped(tx, *args, **kwargs):
+        return transaction_function(InstrumentedTransaction(tx), *args, **kwargs)
+    return wrapped
+
+
+class InstrumentedDriver:
+    """Driver que entrega sesiones instrumentadas; lo demás se delega al driver real"""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    def session(self, **config):
+        # Bookmarks del cliente (X-Neo4j-Bookmarks): se suman a los del proceso solo en
+        # las sesiones de su petición
+        if has_request_context() and 'bookmarks' not in config:
+            bookmarks = g.get('client_bookmarks')
+            if bookmarks is not None:
+                config['bookmarks'] = bookmarks
+        return InstrumentedSession(self._driver.session(**config))
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+def init_instrumentation(app):
+    """Registra los hooks que miden cada petición y agregan Server-Timing"""
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        g.queries = []
+        g.serialize_time = 0.0
+
+    @app.after_request
+    def add_server_timing(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+
+        total = time.perf_counter() - start
+        queries = g.get('queries', [])
+        db_time = sum(stats.db_time for stats in queries)
+        serialize_time = g.get('serialize_time', 0.0)
+        app_time = max(total - db_time - serialize_time, 0.0)
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_time * 1000:.2f};desc="{len(queries)} queries", '
+            f'serialize;dur={serialize_time * 1000:.2f}, '
+            f'app;dur={app_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+        return response
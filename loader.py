@@ -0,0 +1,316 @@
+# loader.py
+# Carga masiva de datos semilla (JSONL o CSV) a Neo4j, sin pasar por la consola de Aura.
+#
+# Uso:
+#   python loader.py --users usuarios.jsonl --tags tags.csv --categories categorias.csv \
+#                    --articles articulos.jsonl --comments comentarios.jsonl \
+#                    --workers 8 --batch-size 2000
+#   python loader.py --maintenance
+#
+# --maintenance (una sola vez, no en cada arranque de la app) normaliza createdAt
+# y calcula los contadores que falten en los datos anteriores; se puede combinar
+# con una carga y corre después de ella.
+#
+# Campos por archivo (los mismos del script scriptbaseneo4j.txt):
+#   users:      id, name, email
+#   tags:       id, name, url
+#   categories: id, name
+#   articles:   id, title, author_id, content, tags, categories, date (opcionales los 4 últimos)
+#   comments:   id, text, user_id, article_id, date (opcional)
+# En CSV las listas (tags, categories) van separadas por ';'. Una fila sin algún campo
+# obligatorio o con un campo desconocido detiene la carga indicando archivo y línea.
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from extensions import init_neo4j, get_driver, close_driver
+from id_allocator import advance_counter
+from counters import recount_article_counts
+from schema import ensure_schema, normalize_created_at
+from transactions import run_write
+
+DEFAULT_WORKERS = int(os.environ.get('LOADER_WORKERS', 4))
+DEFAULT_BATCH_SIZE = int(os.environ.get('LOADER_BATCH_SIZE', 1000))
+
+# Todas las sentencias hacen MERGE sobre el id: si la carga se interrumpe
+# se puede volver a correr, y los reintentos del driver no duplican nodos.
+QUERIES = {
+    'users': """
+    UNWIND $rows AS row
+    MERGE (u:User {id: row.id})
+    SET u.name = row.name,
+        u.email = row.email
+    """,
+    'tags': """
+    UNWIND $rows AS row
+    MERGE (t:Tag {id: row.id})
+    SET t.name = row.name,
+        t.url = row.url
+    """,
+    'categories': """
+    UNWIND $rows AS row
+    MERGE (c:Category {id: row.id})
+    SET c.name = row.name
+    """,
+    'articles': """
+    UNWIND $rows AS row
+    MERGE (a:Article {id: row.id})
+    ON CREATE SET a.createdAt = coalesce(datetime(row.date), datetime())
+    SET a.title = row.title,
+        a.content = row.content
+    WITH row, a
+    CALL {
+        WITH row, a
+        MATCH (u:User {id: row.author_id})
+        MERGE (u)-[:WROTE]->(a)
+    }
+    CALL {
+        WITH row, a
+        UNWIND row.tags AS tag_id
+        MATCH (t:Tag {id: tag_id})
+        MERGE (a)-[:TAGGED_WITH]->(t)
+    }
+    CALL {
+        WITH row, a
+        UNWIND row.categories AS cat_id
+        MATCH (c:Category {id: cat_id})
+        MERGE (a)-[:IN_CATEGORY]->(c)
+    }
+    """,
+    'comments': """
+    UNWIND $rows AS row
+    MERGE (k:Comment {id: row.id})
+    ON CREATE SET k.createdAt = coalesce(datetime(row.date), datetime())
+    SET k.text = row.text
+    WITH row, k
+    CALL {
+        WITH row, k
+        MATCH (u:User {id: row.user_id})
+        MERGE (u)-[:POSTED]->(k)
+    }
+    CALL {
+        WITH row, k
+        MATCH (a:Article {id: row.article_id})
+        MERGE (k)-[:ON_ARTICLE]->(a)
+    }
+    """,
+}
+
+# Orden de carga: los artículos necesitan autores, tags y categorías; los comentarios, artículos
+ORDER = ('users', 'tags', 'categories', 'articles', 'comments')
+
+LABELS = {
+    'users': 'User',
+    'tags': 'Tag',
+    'categories': 'Category',
+    'articles': 'Article',
+    'comments': 'Comment',
+}
+
+# Campos de cada archivo: (obligatorios, opcionales)
+FIELDS = {
+    'users': (('id', 'name', 'email'), ()),
+    'tags': (('id', 'name', 'url'), ()),
+    'categories': (('id', 'name'), ()),
+    'articles': (('id', 'title', 'author_id'), ('content', 'tags', 'categories', 'date')),
+    'comments': (('id', 'text', 'user_id', 'article_id'), ('date',)),
+}
+
+INT_FIELDS = ('id', 'author_id', 'user_id', 'article_id')
+LIST_FIELDS = ('tags', 'categories')
+
+
+def check_fields(name, row):
+    """Lanza ValueError si a la fila le falta un campo obligatorio o trae uno desconocido"""
+    required, optional = FIELDS[name]
+    missing = [field for field in required if row.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"faltan campos: {', '.join(missing)}")
+    unknown = sorted(set(row) - set(required) - set(optional))
+    if unknown:
+        raise ValueError(f"campos desconocidos: {', '.join(unknown)} "
+                         f"(se esperan {', '.join(required + optional)})")
+
+
+def normalize(row):
+    """Convierte los campos de una fila de CSV/JSONL a los tipos que esperan las consultas"""
+    for field in INT_FIELDS:
+        if row.get(field) not in (None, ''):
+            row[field] = int(row[field])
+    for field in LIST_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            row[field] = [int(item) for item in value.split(';') if item.strip()]
+        elif value is None:
+            row[field] = []
+    if row.get('date') == '':
+        row['date'] = None
+    row.setdefault('date', None)
+    return row
+
+
+def read_rows(path, name):
+    """
+    Lee el archivo fila por fila (JSONL o CSV según la extensión), sin cargarlo completo.
+    Lanza ValueError con el archivo y la línea si una fila no tiene los campos de 'name'.
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(f)
+            rows = ((reader.line_num, row) for row in reader)
+        else:
+            rows = ((number, json.loads(line)) for number, line in enumerate(f, 1) if line.strip())
+        for number, row in rows:
+            try:
+                check_fields(name, row)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}")
+            yield normalize(row)
+
+
+def chunks(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Progress:
+    """Filas escritas y filas por segundo, impresas cada cierto intervalo"""
+
+    def __init__(self, name, interval=2.0):
+        self.name = name
+        self.interval = interval
+        self.rows = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.rows += count
+            now = time.perf_counter()
+            if now - self._last >= self.interval:
+                self._last = now
+                self.report()
+
+    def report(self, final=False):
+        elapsed = time.perf_counter() - self.start
+        rate = self.rows / elapsed if elapsed else 0.0
+        end = '\n' if final else '\r'
+        sys.stderr.write(f"{self.name}: {self.rows} filas, {rate:,.0f} filas/s, {elapsed:.1f}s{end}")
+        sys.stderr.flush()
+
+
+def write_chunk(query, chunk):
+    # Cada lote usa su propia sesión: las sesiones no se comparten entre hilos
+    with get_driver().session() as session:
+        run_write(session, query, rows=chunk)
+    return len(chunk)
+
+
+def load_file(name, path, workers, batch_size):
+    """
+    Escribe el archivo en lotes UNWIND repartidos entre 'workers' hilos.
+    Como mucho hay 2 * workers lotes en memoria, sin importar el tamaño del archivo.
+    Devuelve (filas escritas, id máximo).
+    """
+    query = QUERIES[name]
+    progress = Progress(name)
+    max_id = None
+    pending = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks(read_rows(path, name), batch_size):
+            chunk_max = max(row['id'] for row in chunk)
+            max_id = chunk_max if max_id is None else max(max_id, chunk_max)
+
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    progress.add(future.result())
+            pending.add(executor.submit(write_chunk, query, chunk))
+
+        for future in pending:
+            progress.add(future.result())
+
+    progress.report(final=True)
+    return progress.rows, max_id
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Carga masiva de datos a Neo4j con UNWIND por lotes")
+    for name in ORDER:
+        parser.add_argument(f'--{name}', metavar='ARCHIVO', help=f"archivo JSONL o CSV de {name}")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="hilos escribiendo en paralelo")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="filas por transacción")
+    parser.add_argument('--maintenance', action='store_true',
+                        help="normalizar createdAt y calcular los contadores que falten")
+    return parser.parse_args(argv)
+
+
+def maintenance(batch_size):
+    """Tareas de una sola vez sobre los datos existentes, por lotes"""
+    # createdAt guardado como Date por semillas anteriores (la paginación necesita un solo tipo)
+    normalize_created_at(batch_size=batch_size)
+    # articleCount y commentCount de nodos creados antes de que existieran los contadores
+    recount_article_counts(only_missing=True, batch_size=batch_size)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = [(name, getattr(args, name)) for name in ORDER if getattr(args, name)]
+    if not files and not args.maintenance:
+        print("No se indicó ningún archivo para cargar")
+        return 1
+
+    from URI import URI, USER, PASSWORD
+    # Una conexión por hilo, más una para el esquema y los contadores
+    init_neo4j(URI, USER, PASSWORD, max_connection_pool_size=args.workers + 1)
+    try:
+        # Sin las restricciones de unicidad cada MERGE recorre todos los nodos de la etiqueta
+        ensure_schema()
+
+        start = time.perf_counter()
+        total = 0
+        for name, path in files:
+            try:
+                rows, max_id = load_file(name, path, args.workers, args.batch_size)
+            except ValueError as e:
+                print(f"Error en {name}: {e}")
+                return 1
+            total += rows
+            # Puede correr con la app levantada: los workers que tengan un bloque
+            # por debajo de max_id lo descartan al primer choque (create_with_id).
+            if max_id is not None:
+                with get_driver().session() as session:
+                    advance_counter(session, LABELS[name], max_id)
+
+        # Los lotes en paralelo no incrementan articleCount ni commentCount (todos
+        # competirían por el candado de los mismos nodos); se recalculan al final,
+        # por lotes de ids (counters.py).
+        if args.articles or args.comments:
+            recount_article_counts()
+
+        if args.maintenance:
+            maintenance(args.batch_size)
+
+        elapsed = time.perf_counter() - start
+        print(f"Total: {total} filas en {elapsed:.1f}s ({total / elapsed:,.0f} filas/s)")
+    finally:
+        close_driver()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
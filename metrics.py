@@ -0,0 +1,140 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+from extensions import pool_stats
+
+# Límites superiores (en segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RouteSeries:
+    """
+    Histograma de latencia y conteo por código de estado de una ruta.
+    Cada serie tiene su propio candado, así las rutas no compiten entre sí.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.total = 0.0
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, status):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, dict(self.statuses)
+
+
+class Registry:
+    """Series de métricas por (blueprint, endpoint, método) y código de estado"""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, blueprint, endpoint, method, status, seconds):
+        key = (blueprint, endpoint, method)
+        series = self._series.get(key)
+        if series is None:
+            # Solo se toma el candado global la primera vez que aparece una serie
+            with self._lock:
+                series = self._series.setdefault(key, RouteSeries())
+        series.observe(seconds, status)
+
+    def render(self):
+        """Texto en formato de exposición de Prometheus"""
+        lines = [
+            "# HELP http_requests_total Peticiones atendidas por ruta y código de estado.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+        snapshots = [(key, route, route.snapshot()) for key, route in series]
+
+        for (blueprint, endpoint, method), _, (_, _, statuses) in snapshots:
+            for status, count in sorted(statuses.items()):
+                labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method, status=status)
+                lines.append(f"http_requests_total{{{labels}}} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds Latencia de las peticiones por ruta.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (blueprint, endpoint, method), route, (counts, total, _) in snapshots:
+            base = _labels(blueprint=blueprint, endpoint=endpoint, method=method)
+            cumulative = 0
+            for bound, count in zip(route.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{base}}} {total}")
+            lines.append(f"http_request_duration_seconds_count{{{base}}} {cumulative}")
+
+        lines += _pool_lines()
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def _pool_lines():
+    """Gauges del pool de conexiones del driver"""
+    try:
+        stats = pool_stats()
+    except Exception:
+        return []
+    if not stats:
+        return []
+
+    lines = [
+        "# HELP neo4j_pool_max_size Tamaño máximo del pool de conexiones.",
+        "# TYPE neo4j_pool_max_size gauge",
+        f"neo4j_pool_max_size {stats['max_size']}",
+        "# HELP neo4j_pool_waiters Hilos esperando una conexión del pool.",
+        "# TYPE neo4j_pool_waiters gauge",
+        f"neo4j_pool_waiters {stats['waiters']}",
+    ]
+    for state in ("in_use", "idle", "opening"):
+        lines.append(f"# HELP neo4j_pool_{state} Conexiones del pool en estado {state}.")
+        lines.append(f"# TYPE neo4j_pool_{state} gauge")
+        for address, server in stats["servers"].items():
+            lines.append(f'neo4j_pool_{state}{{server="{address}"}} {server[state]}')
+    return lines
+
+
+registry = Registry()
+
+
+def init_metrics(app):
+    """Registra los hooks de medición y el endpoint /metrics"""
+
+    @app.before_request
+    def start_metrics_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_metrics(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            registry.record(
+                request.blueprint or "app",
+                request.endpoint or "unmatched",
+                request.method,
+                response.status_code,
+                time.perf_counter() - start,
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,161 @@
+import base64
+import json
+
+from neo4j.time import DateTime
+
+# Tamaño de página por defecto y máximo permitido para los listados paginados
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def is_paginated(args):
+    """Indica si la petición pidió paginación (con 'limit' o 'after')"""
+    return 'limit' in args or 'after' in args
+
+
+def encode_cursor(created_at, item_id):
+    """Codifica la posición (createdAt, id) del último elemento de la página"""
+    raw = json.dumps([created_at, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica un cursor y devuelve (createdAt como DateTime de Neo4j, id).
+    createdAt es None si la página terminó en un elemento sin createdAt.
+    Acepta también los cursores de fecha sola (python -m doctest pagination.py):
+
+    >>> created_at, item_id = decode_cursor(encode_cursor('2024-05-01', 7))
+    >>> created_at.iso_format(), item_id
+    ('2024-05-01T00:00:00.000000000+00:00', 7)
+    >>> decode_cursor(encode_cursor(None, 7))
+    (None, 7)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+        created_at, item_id = json.loads(raw)
+        if created_at is None:
+            return None, int(item_id)
+        # Cursores de cuando la semilla guardaba date(): la fecha equivale a la medianoche UTC
+        # (así quedan los nodos después de schema.normalize_created_at).
+        # from_iso_format no acepta el sufijo 'Z'
+        if 'T' not in created_at:
+            created_at += 'T00:00:00+00:00'
+        return DateTime.from_iso_format(created_at), int(item_id)
+    except Exception:
+        raise ValueError("Cursor 'after' inválido")
+
+
+def _limit(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("El parámetro 'limit' debe ser un entero")
+    if limit < 1:
+        raise ValueError("El parámetro 'limit' debe ser mayor que 0")
+    return min(limit, MAX_LIMIT)
+
+
+def page_params(args, always=False):
+    """
+    Lee 'limit' y 'after' de la query string y devuelve los parámetros de Cypher.
+    Si la petición no está paginada, limit es None y no hay cursor,
+    salvo con always=True, que pagina con DEFAULT_LIMIT.
+    """
+    if not always and not is_paginated(args):
+        return {"limit": None, "after_ts": None, "after_id": None}
+
+    limit = _limit(args)
+    after_ts, after_id = None, None
+    if args.get('after'):
+        after_ts, after_id = decode_cursor(args['after'])
+
+    return {"limit": limit, "after_ts": after_ts, "after_id": after_id}
+
+
+def keyset_clause(alias, params):
+    """
+    Fragmento de Cypher para filtrar y ordenar por (createdAt, id) descendente.
+    createdAt es siempre DateTime (ver schema.normalize_created_at): con tipos mezclados
+    la comparación da null y el orden separa los Date de los DateTime.
+    La primera página y las siguientes usan textos distintos, sin disyunciones con
+    $after_ts IS NULL, para que el índice de rango de createdAt sirva para buscar y ordenar.
+    Los elementos sin createdAt van primero (DESC pone los null antes). Si la página
+    terminó en uno de ellos el cursor trae createdAt null: siguen los demás sin createdAt
+    de id menor y después todos los que sí lo tienen.
+    Se pide un elemento extra para saber si existe una página siguiente.
+    """
+    where = ""
+    if params["after_ts"] is not None:
+        where = (f"WHERE {alias}.createdAt <= $after_ts\n"
+                 f"      AND ({alias}.createdAt < $after_ts OR {alias}.id < $after_id)")
+    elif params["after_id"] is not None:
+        where = (f"WHERE {alias}.createdAt IS NOT NULL\n"
+                 f"      OR {alias}.id < $after_id")
+    return f"""
+    {where}
+    WITH {alias}
+    ORDER BY {alias}.createdAt DESC, {alias}.id DESC
+    """
+
+
+def limit_clause(params):
+    """Agrega LIMIT solo cuando la petición está paginada"""
+    if params["limit"] is None:
+        return ""
+    return "LIMIT $fetch_limit"
+
+
+def cypher_params(params, extra=1):
+    """
+    Parámetros listos para session.run.
+    Por defecto se pide un elemento extra para calcular next_cursor.
+    """
+    fetch_limit = params["limit"] + extra if params["limit"] is not None else None
+    return {
+        "after_ts": params["after_ts"],
+        "after_id": params["after_id"],
+        "fetch_limit": fetch_limit,
+    }
+
+
+def split_page(items, params, created_key, id_key):
+    """
+    Recorta la página al límite pedido y calcula el next_cursor.
+    Devuelve (items, next_cursor); next_cursor es None si no hay más elementos.
+    """
+    limit = params["limit"]
+    if limit is None or len(items) <= limit:
+        return items, None
+
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(last[created_key], last[id_key])
+
+
+# Los resultados ordenados por relevancia (búsqueda) no tienen una llave estable
+# para keyset; su cursor es la posición del siguiente elemento.
+
+def offset_params(args):
+    """Lee 'limit' y el cursor 'after' (posición). Siempre paginado"""
+    limit = _limit(args)
+    offset = 0
+    if args.get('after'):
+        try:
+            raw = base64.urlsafe_b64decode(args['after'].encode('ascii'))
+            offset = int(json.loads(raw)["offset"])
+        except Exception:
+            raise ValueError("Cursor 'after' inválido")
+        if offset < 0:
+            raise ValueError("Cursor 'after' inválido")
+    return {"limit": limit, "offset": offset}
+
+
+def split_offset_page(items, params):
+    """Como split_page, para resultados pedidos con un elemento extra a partir de 'offset'"""
+    limit = params["limit"]
+    if len(items) <= limit:
+        return items, None
+
+    raw = json.dumps({"offset": params["offset"] + limit}).encode('utf-8')
+    return items[:limit], base64.urlsafe_b64encode(raw).decode('ascii')
@@ -0,0 +1,61 @@
+# Proyección de campos (?fields=) para los listados.
+# Cada ruta define sus campos como {llave de la respuesta: expresión Cypher}
+# y solo las llaves pedidas se escriben en el RETURN: lo que no se pide no sale de la base.
+
+# Largo del extracto que se calcula en la base
+EXCERPT_LENGTH = 150
+
+# ?fields=* devuelve todos los campos
+ALL_FIELDS = '*'
+
+
+def excerpt_expr(expr, length=EXCERPT_LENGTH):
+    """Extracto calculado en Cypher: solo viajan 'length' caracteres del texto"""
+    text = f"coalesce({expr}, '')"
+    return f"CASE WHEN size({text}) > {length} THEN left({text}, {length}) + '...' ELSE {text} END"
+
+
+def select_fields(args, fields, default, required=()):
+    """
+    Lista de campos pedidos con ?fields=a,b,c (en el orden de 'fields').
+    Sin el parámetro se usa 'default'. Los 'required' (p. ej. los del cursor)
+    se incluyen siempre. Lanza ValueError si se pide un campo que no existe.
+    """
+    raw = args.get('fields')
+    if raw is None:
+        wanted = set(default)
+    elif raw.strip() == ALL_FIELDS:
+        wanted = set(fields)
+    else:
+        wanted = {name.strip() for name in raw.split(',') if name.strip()}
+        unknown = sorted(wanted - set(fields))
+        if unknown:
+            raise ValueError(f"Campos desconocidos en 'fields': {', '.join(unknown)}. "
+                             f"Disponibles: {', '.join(fields)}")
+
+    wanted.update(required)
+    return [name for name in fields if name in wanted]
+
+
+def return_clause(fields, selected=None):
+    """RETURN con las expresiones de los campos seleccionados (todos si es None)"""
+    names = fields if selected is None else selected
+    return "\n    RETURN " + ",\n           ".join(f"{fields[name]} as {name}" for name in names) + "\n"
+
+
+# Artículos de un tag o una categoría (/api/tag/<tname>/articulos y
+# /api/categoria/<cname>/articulos); tienen sus propias llaves de respuesta
+RESUMEN_FIELDS = {
+    "_id": "a.id",
+    "title": "a.title",
+    "content": "a.content",
+    "excerpt": excerpt_expr("a.content"),
+    "created_at": "a.createdAt",
+    "author_name": "[(author:User)-[:WROTE]->(a) | author.name][0]",
+    "author_id": "[(author:User)-[:WROTE]->(a) | author.id][0]",
+    "tags": "[(a)-[:TAGGED_WITH]->(tag:Tag) | tag.name]",
+    "categories": "[(a)-[:IN_CATEGORY]->(cat:Category) | cat.name]",
+}
+
+# Por defecto, todo menos el contenido completo
+RESUMEN_LIST_FIELDS = tuple(name for name in RESUMEN_FIELDS if name != "content")
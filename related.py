@@ -0,0 +1,152 @@
+# related.py
+# Artículos relacionados según el grafo: tags y categorías en común, mismo autor
+# y usuarios que comentaron en ambos artículos.
+#
+# La ruta GET /api/articulos/<id>/relacionados calcula la lista al vuelo (y la guarda
+# en caché con TTL). Para grafos grandes se puede precalcular para todos los artículos:
+#   python related.py --limit 20 --batch-size 500
+# que guarda relaciones (a)-[:RELATED {score, computedAt}]->(b). La ruta las usa solo si
+# tienen menos de RELATED_PRECOMPUTED_TTL segundos y el limit pedido no pasa de
+# PRECOMPUTE_LIMIT; si no, calcula al vuelo. Conviene volver a correrlo dentro de ese plazo.
+import argparse
+import os
+import sys
+import time
+
+from extensions import init_neo4j, get_driver, close_driver
+from transactions import run_read, run_write
+
+# Peso de cada tipo de vínculo en el puntaje
+WEIGHTS = {
+    "w_tag": float(os.environ.get('RELATED_WEIGHT_TAG', 3)),
+    "w_category": float(os.environ.get('RELATED_WEIGHT_CATEGORY', 2)),
+    "w_author": float(os.environ.get('RELATED_WEIGHT_AUTHOR', 2)),
+    "w_commenter": float(os.environ.get('RELATED_WEIGHT_COMMENTER', 1)),
+}
+
+# Máximo de artículos que se recorren a través de cada tag, categoría, el autor o cada
+# comentarista, y de comentaristas que se toman del artículo.
+# Un tag muy popular o un artículo con miles de comentarios no obliga a visitar todo.
+MAX_FANOUT = int(os.environ.get('RELATED_MAX_FANOUT', 200))
+
+DEFAULT_LIMIT = 5
+PRECOMPUTE_LIMIT = 20
+
+# Segundos durante los que las relaciones precalculadas se consideran vigentes
+PRECOMPUTED_TTL = int(os.environ.get('RELATED_PRECOMPUTED_TTL', 86400))
+
+# Subconsulta que, para el artículo 'a', produce (other, score) con los $limit mejores.
+# Todos los caminos tienen largo fijo (a lo más 4 saltos) y cada rama corta en $fanout,
+# así el recorrido está acotado.
+RELATED_SUBQUERY = """
+CALL {
+    WITH a
+    CALL {
+        WITH a
+        MATCH (a)-[:TAGGED_WITH]->(t:Tag)
+        CALL {
+            WITH a, t
+            MATCH (t)<-[:TAGGED_WITH]-(other:Article)
+            WHERE other <> a
+            RETURN other LIMIT $fanout
+        }
+        RETURN other, $w_tag AS weight
+        UNION ALL
+        WITH a
+        MATCH (a)-[:IN_CATEGORY]->(c:Category)
+        CALL {
+            WITH a, c
+            MATCH (c)<-[:IN_CATEGORY]-(other:Article)
+            WHERE other <> a
+            RETURN other LIMIT $fanout
+        }
+        RETURN other, $w_category AS weight
+        UNION ALL
+        WITH a
+        CALL {
+            WITH a
+            MATCH (a)<-[:WROTE]-(:User)-[:WROTE]->(other:Article)
+            WHERE other <> a
+            RETURN other LIMIT $fanout
+        }
+        RETURN other, $w_author AS weight
+        UNION ALL
+        WITH a
+        CALL {
+            WITH a
+            MATCH (a)<-[:ON_ARTICLE]-(:Comment)<-[:POSTED]-(u:User)
+            RETURN DISTINCT u LIMIT $fanout
+        }
+        CALL {
+            WITH a, u
+            MATCH (u)-[:POSTED]->(:Comment)-[:ON_ARTICLE]->(other:Article)
+            WHERE other <> a
+            RETURN DISTINCT other LIMIT $fanout
+        }
+        RETURN other, $w_commenter AS weight
+    }
+    WITH other, sum(weight) AS score
+    RETURN other, score
+    ORDER BY score DESC, other.id DESC
+    LIMIT $limit
+}
+"""
+
+# Precalculado: se reemplazan las relaciones RELATED de cada artículo del lote
+PRECOMPUTE_QUERY = """
+UNWIND $ids AS article_id
+MATCH (a:Article {id: article_id})
+CALL {
+    WITH a
+    MATCH (a)-[old:RELATED]->()
+    DELETE old
+}
+""" + RELATED_SUBQUERY + """
+MERGE (a)-[r:RELATED]->(other)
+SET r.score = score,
+    r.computedAt = datetime()
+"""
+
+
+def related_params(limit):
+    return dict(WEIGHTS, fanout=MAX_FANOUT, limit=limit)
+
+
+def precompute(batch_size=500, limit=PRECOMPUTE_LIMIT):
+    """Calcula y guarda los relacionados de todos los artículos, por lotes de ids"""
+    driver = get_driver()
+    with driver.session() as session:
+        records, _ = run_read(session, "MATCH (a:Article) RETURN a.id AS id ORDER BY id")
+    ids = [record["id"] for record in records]
+
+    start = time.perf_counter()
+    with driver.session() as session:
+        for offset in range(0, len(ids), batch_size):
+            batch = ids[offset:offset + batch_size]
+            run_write(session, PRECOMPUTE_QUERY, ids=batch, **related_params(limit))
+            elapsed = time.perf_counter() - start
+            done = offset + len(batch)
+            sys.stderr.write(f"relacionados: {done}/{len(ids)} artículos, "
+                             f"{done / elapsed:,.0f} artículos/s\r")
+    sys.stderr.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcula los artículos relacionados de todo el grafo")
+    parser.add_argument('--limit', type=int, default=PRECOMPUTE_LIMIT,
+                        help="relacionados que se guardan por artículo")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="artículos por transacción")
+    args = parser.parse_args(argv)
+
+    from URI import URI, USER, PASSWORD
+    init_neo4j(URI, USER, PASSWORD)
+    try:
+        precompute(args.batch_size, args.limit)
+    finally:
+        close_driver()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,74 +1,307 @@
 from flask import Blueprint, request, jsonify
 from extensions import get_driver
-import json
-from datetime import datetime
+from id_allocator import create_with_id, allocate_ids
+from batch import (batch_args, validate_items, run_batch, batch_response,
+                   created_result, error_result, id_list_error)
+from transactions import BOOKMARKS_HEADER, run_read, run_write
+from pagination import (is_paginated, page_params, keyset_clause, limit_clause,
+                        cypher_params, split_page, offset_params, split_offset_page,
+                        MAX_LIMIT)
+from search import (ARTICLE_INDEX, COMMENT_INDEX, COMMENT_OVERFETCH, query_terms, lucene_query,
+                    highlight, excerpt)
+from cache import article_cache, reference_cache, related_cache, single_flight
+from cascade import start_cascade, accepted
+from versions import ARTICULO_RESOURCES, conditional, bump
+from related import (RELATED_SUBQUERY, DEFAULT_LIMIT as RELATED_LIMIT, PRECOMPUTE_LIMIT,
+                     PRECOMPUTED_TTL, related_params)
+from serialization import record_to_dict, json_response, wants_ndjson, ndjson_response
+from projection import excerpt_expr, select_fields, return_clause
 
 articulos_bp = Blueprint('articulos', __name__)
 
-def serialize_neo4j_data(data):
-    """Función helper para serializar datos de Neo4j a JSON"""
-    if isinstance(data, dict):
-        return {key: serialize_neo4j_data(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [serialize_neo4j_data(item) for item in data]
-    elif hasattr(data, 'iso_format'):
-        # Para objetos de fecha de Neo4j
-        return data.iso_format()
-    elif hasattr(data, 'to_native'):
-        # Para otros tipos de Neo4j
-        return data.to_native()
-    else:
-        return data
+# Campos de un artículo (llave de la respuesta -> expresión Cypher).
+# Las relaciones se leen con pattern comprehensions, sin agregación.
+ARTICULO_FIELDS = {
+    "articulo_id": "a.id",
+    "titulo": "a.title",
+    "content": "a.content",
+    "excerpt": excerpt_expr("a.content"),
+    "created_at": "a.createdAt",
+    "user_id": "[(author:User)-[:WROTE]->(a) | author.id][0]",
+    "user_name": "[(author:User)-[:WROTE]->(a) | author.name][0]",
+    "tags": "[(a)-[:TAGGED_WITH]->(tag:Tag) | {tname: tag.name}]",
+    "categories": "[(a)-[:IN_CATEGORY]->(cat:Category) | {cname: cat.name}]",
+}
+
+# Proyección completa de un artículo (detalle, creación, relacionados, búsqueda)
+ARTICULO_RETURN = return_clause(ARTICULO_FIELDS, [
+    "articulo_id", "titulo", "content", "created_at", "user_id", "user_name", "tags", "categories"
+])
+
+# Perfil compacto de los listados: extracto en lugar del contenido completo
+ARTICULO_LIST_FIELDS = (
+    "articulo_id", "titulo", "excerpt", "created_at", "user_id", "user_name", "tags", "categories"
+)
+
+def parse_ids(value):
+    """'1,2,3' -> [1, 2, 3] sin repetidos. Lanza ValueError si no son enteros"""
+    try:
+        ids = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise ValueError("El parámetro 'ids' debe ser una lista de enteros separados por comas")
+    if len(ids) > MAX_LIMIT:
+        raise ValueError(f"Máximo {MAX_LIMIT} ids por petición")
+    return list(dict.fromkeys(ids))
+
+
+ARTICULOS_BY_ID_QUERY = f"""
+MATCH (a:Article)
+WHERE a.id IN $ids
+{ARTICULO_RETURN}
+"""
+
+
+def cached_articulos(ids, bookmarks=False):
+    """
+    Devuelve ({id: artículo} de los que están en article_cache, ids que faltan).
+    Con bookmarks=True (el cliente acaba de escribir) faltan todos: se leen de la base.
+    """
+    if bookmarks:
+        return {}, list(ids)
+    found = {}
+    missing = []
+    for articulo_id in ids:
+        cached = article_cache.get(f"articulo:{articulo_id}")
+        if cached is None:
+            missing.append(articulo_id)
+        else:
+            found[articulo_id] = cached
+    return found, missing
+
+
+def remember_articulos(records, found):
+    """Guarda en article_cache los artículos leídos de la base y los agrega a 'found'"""
+    for record in records:
+        articulo = record_to_dict(record)
+        article_cache.set(f"articulo:{articulo['articulo_id']}", articulo)
+        found[articulo['articulo_id']] = articulo
+
+
+def articulos_by_id(session, ids):
+    """
+    Artículos por id con la misma forma que get_articulos, en el orden pedido.
+    Lectura a través de article_cache: solo los ids que faltan van a la base,
+    todos en una sola consulta. Los ids que no existen se omiten.
+    Las peticiones con bookmarks no usan la caché (pero la actualizan).
+    """
+    found, missing = cached_articulos(ids, bookmarks=BOOKMARKS_HEADER in request.headers)
+    if missing:
+        records, _ = run_read(session, ARTICULOS_BY_ID_QUERY, ids=missing)
+        remember_articulos(records, found)
+    return [found[articulo_id] for articulo_id in ids if articulo_id in found]
+
+
+def articulos_query(page, fields, ordered=True):
+    """
+    Query del listado con los campos pedidos.
+    Primero se elige la página (createdAt, id) y después se expanden las relaciones,
+    así cada página cuesta lo mismo sin importar qué tan profundo se navegue.
+    Las relaciones se leen con pattern comprehensions (sin agregación).
+    Con ordered=False (exportación completa) no hay ORDER BY: las filas salen conforme
+    se recorren los nodos, sin esperar a ordenar toda la etiqueta antes del primer byte.
+    """
+    return f"""
+    MATCH (a:Article)
+    {keyset_clause('a', page) if ordered else ''}
+    {limit_clause(page)}
+    {return_clause(ARTICULO_FIELDS, fields)}
+    """
+
 
 # GET /api/articulos
+# Paginación opcional por cursor: ?limit=20&after=<next_cursor>
+# Campos: ?fields=titulo,content,... (por defecto ARTICULO_LIST_FIELDS; ?fields=* todos)
+# Varios artículos por id: ?ids=1,2,3
 @articulos_bp.route('', methods=['GET'])
+@conditional(*ARTICULO_RESOURCES)
+@single_flight
 def get_articulos():
     driver = get_driver()
     
-    # Query para obtener artículos con información completa
-    query = """
-    MATCH (a:Article)
-    OPTIONAL MATCH (author:User)-[:WROTE]->(a)
-    OPTIONAL MATCH (a)-[:TAGGED_WITH]->(tag:Tag)
-    OPTIONAL MATCH (a)-[:IN_CATEGORY]->(cat:Category)
-    RETURN a.id as articulo_id,
-           a.title as titulo,
-           a.content as content,
-           a.createdAt as created_at,
-           author.id as user_id,
-           author.name as user_name,
-           COLLECT(DISTINCT {tname: tag.name}) as tags,
-           COLLECT(DISTINCT {cname: cat.name}) as categories
-    ORDER BY a.createdAt DESC
-    """
+    if 'ids' in request.args:
+        try:
+            ids = parse_ids(request.args['ids'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            with driver.session() as session:
+                return json_response(articulos_by_id(session, ids))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    try:
+        page = page_params(request.args)
+        # created_at y articulo_id siempre van: con ellos se arma el cursor
+        fields = select_fields(request.args, ARTICULO_FIELDS, ARTICULO_LIST_FIELDS,
+                               required=("articulo_id", "created_at"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # ?format=ndjson: una línea JSON por artículo, con memoria constante.
+    # Sin 'limit' ni 'after' es una exportación completa: sin orden, para que el
+    # tiempo al primer byte no crezca con el tamaño de la tabla
+    if wants_ndjson(request):
+        query = articulos_query(page, fields, ordered=is_paginated(request.args))
+        return ndjson_response(query, cypher_params(page, extra=0))
+    
+    query = articulos_query(page, fields)
+    
+    try:
+        with driver.session() as session:
+            records, _ = run_read(session, query, **cypher_params(page))
+            # Los alias del RETURN ya son las llaves de la respuesta
+            articulos = [record_to_dict(record) for record in records]
+            
+            # Sin 'limit' ni 'after' se mantiene la respuesta original (lista completa)
+            if not is_paginated(request.args):
+                return json_response(articulos)
+            
+            articulos, next_cursor = split_page(articulos, page, "created_at", "articulo_id")
+            return json_response({
+                "articulos": articulos,
+                "next_cursor": next_cursor
+            })
+            
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# GET /api/articulos/search?q=
+# Búsqueda en título y contenido de artículos y en el texto de sus comentarios,
+# ordenada por relevancia. Paginada: ?limit=20&after=<next_cursor>
+SEARCH_QUERY = f"""
+CALL {{
+    CALL db.index.fulltext.queryNodes('{ARTICLE_INDEX}', $q, {{limit: $top}})
+    YIELD node, score
+    RETURN node AS a, score, null AS comment
+    UNION ALL
+    // Varios comentarios pueden ser del mismo artículo: se piden más coincidencias
+    // y se agrupan por artículo antes de quedarse con los 'top' mejores
+    CALL db.index.fulltext.queryNodes('{COMMENT_INDEX}', $q, {{limit: $comment_top}})
+    YIELD node, score
+    MATCH (node)-[:ON_ARTICLE]->(a:Article)
+    WITH a, node.text AS comment, score
+    ORDER BY score DESC
+    WITH a, max(score) AS score, collect(comment)[0] AS comment
+    ORDER BY score DESC, a.id DESC
+    LIMIT $top
+    RETURN a, score, comment
+}}
+// Un artículo puede coincidir por sí mismo y por sus comentarios: se queda el mejor puntaje
+// (collect omite el null de la coincidencia del artículo)
+WITH a, max(score) AS score, collect(comment)[0] AS comment
+ORDER BY score DESC, a.id DESC
+SKIP $offset
+LIMIT $fetch_limit
+{ARTICULO_RETURN.rstrip()},
+           score,
+           comment
+"""
+
+@articulos_bp.route('/search', methods=['GET'])
+@conditional('comentarios', *ARTICULO_RESOURCES)
+@single_flight
+def search_articulos():
+    driver = get_driver()
+    
+    terms = query_terms(request.args.get('q'))
+    if not terms:
+        return jsonify({"error": "El parámetro 'q' es requerido"}), 400
+    
+    try:
+        page = offset_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Cada índice aporta solo sus mejores 'top' artículos, que alcanzan
+    # para armar la página pedida sin recorrer todas las coincidencias
+    fetch_limit = page["limit"] + 1
+    top = page["offset"] + fetch_limit
     
     try:
         with driver.session() as session:
-            result = session.run(query)
+            records, _ = run_read(session, SEARCH_QUERY,
+                                  q=lucene_query(terms), top=top,
+                                  comment_top=top * COMMENT_OVERFETCH,
+                                  offset=page["offset"], fetch_limit=fetch_limit)
+            
             articulos = []
+            for record in records:
+                articulo = record_to_dict(record)
+                articulo["titulo_highlight"] = highlight(articulo["titulo"], terms)
+                # Solo el extracto: el contenido completo no viaja en la respuesta
+                articulo["excerpt"] = excerpt(articulo.pop("content"), terms)
+                comment = articulo.pop("comment")
+                articulo["comment_excerpt"] = excerpt(comment, terms) if comment else None
+                articulos.append(articulo)
             
-            for record in result:
-                # Convertir el registro a diccionario y serializar
-                articulo_data = dict(record)
-                articulo_serializado = serialize_neo4j_data(articulo_data)
-                
-                articulos.append({
-                    "articulo_id": articulo_serializado["articulo_id"],
-                    "user_id": articulo_serializado["user_id"],
-                    "user_name": articulo_serializado["user_name"],
-                    "titulo": articulo_serializado["titulo"],
-                    "content": articulo_serializado["content"],
-                    "tags": articulo_serializado["tags"] or [],
-                    "categories": articulo_serializado["categories"] or [],
-                    "created_at": articulo_serializado["created_at"]
-                })
-            
-            return jsonify(articulos)
+            articulos, next_cursor = split_offset_page(articulos, page)
+            return json_response({
+                "q": request.args.get('q'),
+                "articulos": articulos,
+                "next_cursor": next_cursor
+            })
+            
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# GET /api/articulos/<id>
+@articulos_bp.route('/<int:id>', methods=['GET'])
+@conditional(*ARTICULO_RESOURCES)
+def get_articulo(id):
+    driver = get_driver()
+    
+    try:
+        with driver.session() as session:
+            articulos = articulos_by_id(session, [id])
+            
+            if not articulos:
+                return jsonify({"error": "Artículo no encontrado"}), 404
+            
+            return json_response(articulos[0])
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # POST /api/articulos
+# Autor, artículo, tags y categorías se crean en una sola sentencia:
+# un viaje a la base y atómico. CREATE (no MERGE) sobre el id asignado: si ese id ya
+# existe, la restricción de unicidad rechaza la sentencia en lugar de agregarle relaciones
+# a otro artículo.
+CREATE_ARTICULO_QUERY = """
+MATCH (author:User {id: $author_id})
+CREATE (a:Article {id: $id,
+                   title: $title,
+                   content: $content,
+                   createdAt: datetime(),
+                   commentCount: 0})
+CREATE (author)-[:WROTE]->(a)
+WITH a
+CALL {
+    WITH a
+    UNWIND $tags AS tag_id
+    MATCH (t:Tag {id: tag_id})
+    MERGE (a)-[:TAGGED_WITH]->(t)
+    ON CREATE SET t.articleCount = coalesce(t.articleCount, 0) + 1
+}
+CALL {
+    WITH a
+    UNWIND $categories AS cat_id
+    MATCH (c:Category {id: cat_id})
+    MERGE (a)-[:IN_CATEGORY]->(c)
+    ON CREATE SET c.articleCount = coalesce(c.articleCount, 0) + 1
+}
+""" + ARTICULO_RETURN
+
 @articulos_bp.route('', methods=['POST'])
 def create_articulo():
     data = request.get_json()
@@ -78,161 +311,269 @@ def create_articulo():
         # Validar datos requeridos
         if not data.get('titulo') or not data.get('article_text'):
             return jsonify({"error": "Faltan campos requeridos: titulo y article_text"}), 400
+        error = id_list_error(data, 'tags') or id_list_error(data, 'categories')
+        if error:
+            return jsonify({"error": error}), 400
         
         with driver.session() as session:
-            # Obtener el siguiente ID para el artículo
-            id_query = "MATCH (a:Article) RETURN coalesce(max(a.id), 0) + 1 as nextId"
-            id_result = session.run(id_query).single()
-            new_id = id_result["nextId"]
-            
-            # Crear el artículo
-            create_query = """
-            CREATE (a:Article {
-                id: $id,
-                title: $title,
-                content: $content,
-                createdAt: datetime()
-            })
-            WITH a
-            MATCH (author:User {id: $author_id})
-            MERGE (author)-[:WROTE]->(a)
-            RETURN a
-            """
-            
-            # Ejecutar creación del artículo
-            result = session.run(create_query, 
-                       id=new_id,
-                       title=data.get('titulo'),
-                       content=data.get('article_text'),
-                       author_id=data.get('user_id', 0))
-            
-            if not result.single():
-                return jsonify({"error": "No se pudo crear el artículo"}), 500
-            
-            # Conectar tags si se proporcionan
-            tags = data.get('tags', [])
-            if tags:
-                tag_query = """
-                MATCH (a:Article {id: $article_id})
-                UNWIND $tags AS tag_id
-                MATCH (t:Tag {id: tag_id})
-                MERGE (a)-[:TAGGED_WITH]->(t)
-                """
-                session.run(tag_query, article_id=new_id, tags=tags)
-            
-            # Conectar categorías si se proporcionan
-            categories = data.get('categories', [])
-            if categories:
-                cat_query = """
-                MATCH (a:Article {id: $article_id})
-                UNWIND $categories AS cat_id
-                MATCH (c:Category {id: cat_id})
-                MERGE (a)-[:IN_CATEGORY]->(c)
-                """
-                session.run(cat_query, article_id=new_id, categories=categories)
-            
-            # Recuperar el artículo creado con toda la información
-            get_query = """
-            MATCH (a:Article {id: $id})
-            OPTIONAL MATCH (author:User)-[:WROTE]->(a)
-            OPTIONAL MATCH (a)-[:TAGGED_WITH]->(tag:Tag)
-            OPTIONAL MATCH (a)-[:IN_CATEGORY]->(cat:Category)
-            RETURN a.id as articulo_id,
-                   a.title as titulo,
-                   a.content as content,
-                   a.createdAt as created_at,
-                   author.id as user_id,
-                   author.name as user_name,
-                   COLLECT(DISTINCT {tname: tag.name}) as tags,
-                   COLLECT(DISTINCT {cname: cat.name}) as categories
-            """
-            
-            result = session.run(get_query, id=new_id).single()
-            
-            if result:
-                articulo_data = dict(result)
-                articulo_serializado = serialize_neo4j_data(articulo_data)
-                
-                new_article = {
-                    "articulo_id": articulo_serializado["articulo_id"],
-                    "user_id": articulo_serializado["user_id"],
-                    "user_name": articulo_serializado["user_name"],
-                    "titulo": articulo_serializado["titulo"],
-                    "content": articulo_serializado["content"],
-                    "tags": articulo_serializado["tags"] or [],
-                    "categories": articulo_serializado["categories"] or [],
-                    "created_at": articulo_serializado["created_at"]
-                }
-                
-                return jsonify(new_article), 201
-            else:
-                return jsonify({"error": "No se pudo recuperar el artículo creado"}), 500
+            # El ID del artículo sale del bloque reservado en el contador.
+            # Cambia el articleCount de sus tags y categorías
+            def create(new_id):
+                return run_write(session, CREATE_ARTICULO_QUERY,
+                                 then=bump('articulos', 'tags', 'categorias'),
+                                 id=new_id,
+                                 title=data.get('titulo'),
+                                 content=data.get('article_text'),
+                                 author_id=data.get('user_id', 0),
+                                 tags=data.get('tags') or [],
+                                 categories=data.get('categories') or [])
+            
+            records, _ = create_with_id(session, 'Article', create)
+            
+            # Sin filas significa que el MATCH del autor no encontró al usuario
+            if not records:
+                return jsonify({"error": "El usuario especificado no existe"}), 404
+            
+            articulo = record_to_dict(records[0])
+            reference_cache.invalidate('tags')
+            reference_cache.invalidate('categorias')
+            # Puede aparecer en los relacionados de otros artículos
+            related_cache.invalidate('relacionados:')
+            # Se reemplaza cualquier copia previa de ese id con el artículo recién creado
+            article_cache.set(f"articulo:{articulo['articulo_id']}", articulo)
+            return json_response(articulo, 201)
                 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# POST /api/articulos/batch
+# Espera: [{ titulo, article_text, user_id, tags, categories }, ...]. Opcional: ?chunk_size=500
+CREATE_ARTICULOS_BATCH_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (author:User {id: row.user_id})
+CALL {
+    WITH row, author
+    WITH row, author WHERE author IS NOT NULL
+    CREATE (a:Article {id: row.id,
+                       title: row.titulo,
+                       content: row.article_text,
+                       createdAt: datetime(),
+                       commentCount: 0})
+    CREATE (author)-[:WROTE]->(a)
+    WITH row, a
+    CALL {
+        WITH row, a
+        UNWIND row.tags AS tag_id
+        MATCH (t:Tag {id: tag_id})
+        MERGE (a)-[:TAGGED_WITH]->(t)
+        ON CREATE SET t.articleCount = coalesce(t.articleCount, 0) + 1
+    }
+    CALL {
+        WITH row, a
+        UNWIND row.categories AS cat_id
+        MATCH (c:Category {id: cat_id})
+        MERGE (a)-[:IN_CATEGORY]->(c)
+        ON CREATE SET c.articleCount = coalesce(c.articleCount, 0) + 1
+    }
+    RETURN count(a) AS created
+}
+RETURN row.index AS index, row.id AS id, created > 0 AS created
+"""
+
+@articulos_bp.route('/batch', methods=['POST'])
+def create_articulos_batch():
+    try:
+        items, chunk_size = batch_args(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def validate(item):
+        if not item.get('titulo') or not item.get('article_text'):
+            return "Faltan campos requeridos: titulo y article_text"
+        return id_list_error(item, 'tags') or id_list_error(item, 'categories')
+    
+    def to_result(record):
+        if record["created"]:
+            return created_result(record["index"], record["id"])
+        return error_result(record["index"], "El usuario especificado no existe")
+    
+    rows, results = validate_items(items, validate,
+                                   ('titulo', 'article_text', 'user_id', 'tags', 'categories'))
+    for row in rows:
+        # Mismos valores por defecto que create_articulo
+        row["user_id"] = row["user_id"] if row["user_id"] is not None else 0
+        row["tags"] = row["tags"] or []
+        row["categories"] = row["categories"] or []
+    
+    driver = get_driver()
+    try:
+        with driver.session() as session:
+            # Un solo bloque de IDs para todo el lote
+            for row, new_id in zip(rows, allocate_ids(session, 'Article', len(rows))):
+                row["id"] = new_id
+            # Cambia el articleCount de sus tags y categorías
+            results += run_batch(session, CREATE_ARTICULOS_BATCH_QUERY, rows, chunk_size, to_result,
+                                 then=bump('articulos', 'tags', 'categorias'))
+            reference_cache.invalidate('tags')
+            reference_cache.invalidate('categorias')
+            related_cache.invalidate('relacionados:')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    return json_response(batch_response(results))
+
 # DELETE /api/articulos/<id>
+# Borra el artículo y sus comentarios en segundo plano, por lotes (cascade.py).
+# Responde 202 con el trabajo; su estado se consulta en /api/jobs/<job_id>.
 @articulos_bp.route('/<int:id>', methods=['DELETE'])
 def delete_articulo(id):
     driver = get_driver()
     
     try:
         with driver.session() as session:
-            # Eliminar el artículo y todas sus relaciones
-            query = """
-            MATCH (a:Article {id: $id})
-            OPTIONAL MATCH (c:Comment)-[:ON_ARTICLE]->(a)
-            DETACH DELETE a, c
-            """
+            records, _ = run_read(session, "MATCH (a:Article {id: $id}) RETURN a.id", id=id)
             
-            result = session.run(query, id=id)
-            summary = result.consume()
-            
-            if summary.counters.nodes_deleted == 0:
+            if not records:
                 return jsonify({"error": "Artículo no encontrado"}), 404
-                
-            return "", 204
+        
+        def on_done():
+            article_cache.invalidate(f"articulo:{id}")
+            # Puede aparecer en los relacionados de otros artículos
+            related_cache.invalidate('relacionados:')
+            # Cambió el articleCount de sus tags y categorías
+            reference_cache.invalidate('tags')
+            reference_cache.invalidate('categorias')
+        
+        job = start_cascade('articulo', on_done=on_done,
+                            resources=('articulos', 'comentarios', 'tags', 'categorias'), id=id)
+        return accepted(job)
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# GET /api/articulos/<id>/relacionados
+# Otros artículos ordenados por tags y categorías en común, mismo autor
+# y comentaristas en común (pesos en related.py). ?limit=5
+# Las relaciones precalculadas de un artículo se guardan juntas (mismo computedAt):
+# si ya vencieron no se devuelve ninguna y se calcula al vuelo.
+RELATED_PRECOMPUTED_QUERY = f"""
+MATCH (:Article {{id: $id}})-[r:RELATED]->(a:Article)
+WHERE r.computedAt >= datetime() - duration({{seconds: $ttl}})
+WITH a, r.score AS score
+ORDER BY score DESC, a.id DESC
+LIMIT $limit
+{ARTICULO_RETURN.rstrip()},
+           score
+"""
+
+RELATED_LIVE_QUERY = f"""
+MATCH (a:Article {{id: $id}})
+{RELATED_SUBQUERY}
+WITH other AS a, score
+{ARTICULO_RETURN.rstrip()},
+           score
+"""
+
+@articulos_bp.route('/<int:id>/relacionados', methods=['GET'])
+@conditional('comentarios', *ARTICULO_RESOURCES)
+@single_flight
+def get_relacionados(id):
+    driver = get_driver()
+    
+    try:
+        limit = int(request.args.get('limit', RELATED_LIMIT))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un entero"}), 400
+    if limit < 1 or limit > MAX_LIMIT:
+        return jsonify({"error": f"El parámetro 'limit' debe estar entre 1 y {MAX_LIMIT}"}), 400
+    
+    key = f"relacionados:{id}:{limit}"
+    # Con bookmarks el cliente acaba de escribir: se lee de la base, no de la caché
+    if BOOKMARKS_HEADER not in request.headers:
+        cached = related_cache.get(key)
+        if cached is not None:
+            return json_response(cached)
+    
+    try:
+        with driver.session() as session:
+            # Primero lo precalculado por related.py, si está vigente y alcanza para 'limit'
+            # (solo se guardan PRECOMPUTE_LIMIT por artículo); si no, se calcula al vuelo
+            records = []
+            if limit <= PRECOMPUTE_LIMIT:
+                records, _ = run_read(session, RELATED_PRECOMPUTED_QUERY, id=id, limit=limit,
+                                      ttl=PRECOMPUTED_TTL)
+            if not records:
+                records, _ = run_read(session, RELATED_LIVE_QUERY, id=id, **related_params(limit))
+            
+            if not records:
+                existing, _ = run_read(session, "MATCH (a:Article {id: $id}) RETURN a.id", id=id)
+                if not existing:
+                    return jsonify({"error": "Artículo no encontrado"}), 404
+            
+            relacionados = [record_to_dict(record) for record in records]
+            related_cache.set(key, relacionados)
+            return json_response(relacionados)
+            
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+COMMENT_COUNT_QUERY = "MATCH (a:Article {id: $id}) RETURN coalesce(a.commentCount, 0) AS total"
+
+
+def comentarios_articulo_query(page, ordered=True):
+    """
+    Solo se ordenan y expanden los comentarios de la página pedida:
+    la memoria por petición no depende del tamaño del hilo.
+    Con ordered=False (exportación completa) no hay ORDER BY.
+    """
+    return f"""
+    MATCH (c:Comment)-[:ON_ARTICLE]->(:Article {{id: $id}})
+    {keyset_clause('c', page) if ordered else ''}
+    {limit_clause(page)}
+    MATCH (u:User)-[:POSTED]->(c)
+    RETURN c.id as _id,
+           c.text as comment,
+           c.createdAt as created_at,
+           u.name as user_name,
+           u.id as user_id
+    """
+
 # GET /api/articulos/<id>/comentarios
+# Siempre paginado (por defecto 20): ?limit=20&after=<next_cursor>
+# 'count' es el total de comentarios del artículo (contador commentCount).
+# ?format=ndjson sin 'limit' ni 'after' transmite todo el hilo
 @articulos_bp.route('/<int:id>/comentarios', methods=['GET'])
+@conditional('comentarios', 'usuarios', 'articulos')
+@single_flight
 def get_comentarios_articulo(id):
     driver = get_driver()
+    ndjson = wants_ndjson(request)
+    
+    try:
+        page = page_params(request.args, always=not ndjson)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # ?format=ndjson: una línea JSON por comentario, con memoria constante
+    if ndjson:
+        query = comentarios_articulo_query(page, ordered=is_paginated(request.args))
+        return ndjson_response(query, dict(cypher_params(page, extra=0), id=id))
+    
+    query = comentarios_articulo_query(page)
     
     try:
-        query = """
-        MATCH (c:Comment)-[:ON_ARTICLE]->(a:Article {id: $id})
-        MATCH (u:User)-[:POSTED]->(c)
-        RETURN c.id as _id,
-               c.text as comment,
-               c.createdAt as created_at,
-               u.name as user_name,
-               u.id as user_id
-        ORDER BY c.createdAt DESC
-        """
-        
         with driver.session() as session:
-            result = session.run(query, id=id)
-            comentarios = []
+            records, _ = run_read(session, query, id=id, **cypher_params(page))
+            comentarios = [record_to_dict(record) for record in records]
+            comentarios, next_cursor = split_page(comentarios, page, "created_at", "_id")
             
-            for record in result:
-                comentario_data = dict(record)
-                comentario_serializado = serialize_neo4j_data(comentario_data)
-                
-                comentarios.append({
-                    "_id": comentario_serializado["_id"],
-                    "comment": comentario_serializado["comment"],
-                    "created_at": comentario_serializado["created_at"],
-                    "user_name": comentario_serializado["user_name"],
-                    "user_id": comentario_serializado["user_id"]
-                })
-            
-            return jsonify({
+            total, _ = run_read(session, COMMENT_COUNT_QUERY, id=id)
+            
+            return json_response({
                 "articulo_id": id,
-                "count": len(comentarios),
-                "comentarios": comentarios
+                "count": total[0]["total"] if total else 0,
+                "comentarios": comentarios,
+                "next_cursor": next_cursor
             })
             
     except Exception as e:
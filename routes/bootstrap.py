@@ -0,0 +1,75 @@
+from flask import Blueprint, request, jsonify
+from extensions import get_driver
+from transactions import run_read
+from pagination import page_params, keyset_clause, limit_clause, cypher_params, split_page
+from projection import select_fields
+from serialization import serialize, json_response
+from versions import ARTICULO_RESOURCES, conditional
+from cache import single_flight
+from routes.articulos import ARTICULO_FIELDS, ARTICULO_LIST_FIELDS
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+
+def bootstrap_query(page, fields):
+    """
+    Una sola consulta con los cuatro listados del primer render.
+    Cada CALL {} devuelve una fila con su lista, así el resultado es un solo registro
+    y todo sale de la base en un viaje (una sesión, una transacción de lectura).
+    """
+    articulo = ", ".join(f"{name}: {ARTICULO_FIELDS[name]}" for name in fields)
+    return f"""
+    CALL {{
+        MATCH (u:User)
+        RETURN collect(u) AS usuarios
+    }}
+    CALL {{
+        MATCH (t:Tag)
+        WITH t ORDER BY t.name
+        RETURN collect({{_id: t.id, tname: t.name}}) AS tags
+    }}
+    CALL {{
+        MATCH (c:Category)
+        WITH c ORDER BY c.name
+        RETURN collect({{_id: c.id, category_name: c.name}}) AS categorias
+    }}
+    CALL {{
+        MATCH (a:Article)
+        {keyset_clause('a', page)}
+        {limit_clause(page)}
+        RETURN collect({{{articulo}}}) AS articulos
+    }}
+    RETURN usuarios, tags, categorias, articulos
+    """
+
+
+# GET /api/bootstrap
+# Lo que la página de artículos necesita para pintarse: usuarios (como /api/usuarios),
+# tags (como /api/tags/ids), categorías (como /api/categorias/ids) y artículos
+# (como /api/articulos; acepta ?fields= y ?limit=/?after=, que agregan next_cursor).
+# ETag según las versiones de esos recursos (ver versions.py): sin cambios, 304.
+@bootstrap_bp.route('', methods=['GET'], strict_slashes=False)
+@conditional(*ARTICULO_RESOURCES)
+@single_flight
+def get_bootstrap():
+    driver = get_driver()
+    
+    try:
+        page = page_params(request.args)
+        fields = select_fields(request.args, ARTICULO_FIELDS, ARTICULO_LIST_FIELDS,
+                               required=("articulo_id", "created_at"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        with driver.session() as session:
+            records, _ = run_read(session, bootstrap_query(page, fields), **cypher_params(page))
+        
+        data = serialize(dict(records[0]))
+        if page["limit"] is not None:
+            data["articulos"], data["next_cursor"] = split_page(
+                data["articulos"], page, "created_at", "articulo_id")
+        
+        return json_response(data)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,71 +1,58 @@
 from flask import Blueprint, request, jsonify
 from extensions import get_driver
+from id_allocator import create_with_id
+from transactions import run_read, run_write
+from cache import reference_cache, article_cache, related_cache, cached_response
+from cascade import start_cascade, accepted
+from versions import conditional, bump
+from serialization import serialize, record_to_dict, json_response
 import urllib.parse
 
 categorias_bp = Blueprint('categorias', __name__)
 
-def serialize_neo4j_data(data):
-    """Función helper para serializar datos de Neo4j a JSON"""
-    if isinstance(data, dict):
-        return {key: serialize_neo4j_data(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [serialize_neo4j_data(item) for item in data]
-    elif hasattr(data, 'iso_format'):
-        return data.iso_format()
-    elif hasattr(data, 'to_native'):
-        return data.to_native()
-    else:
-        return data
+CATEGORIAS_QUERY = """
+MATCH (c:Category) 
+RETURN c.id as _id, c.name as category_name,
+       coalesce(c.articleCount, 0) as articleCount
+ORDER BY c.name
+"""
+
+
+def categoria_to_dict(record):
+    categoria = record_to_dict(record)
+    categoria["url_cat"] = f"/categoria/{categoria['category_name'].lower().replace(' ', '-')}"
+    return categoria
 
 # GET /api/categorias
 @categorias_bp.route('', methods=['GET'])
+@conditional('categorias')
+@cached_response(reference_cache, 'categorias:')
 def get_categorias():
     driver = get_driver()
-    query = """
-    MATCH (c:Category) 
-    RETURN c.id as _id, c.name as category_name
-    ORDER BY c.name
-    """
     
     try:
         with driver.session() as session:
-            result = session.run(query)
-            categorias = []
+            records, _ = run_read(session, CATEGORIAS_QUERY)
+            categorias = [categoria_to_dict(record) for record in records]
             
-            for record in result:
-                categoria_data = dict(record)
-                categoria_serializada = serialize_neo4j_data(categoria_data)
-                
-                categorias.append({
-                    "_id": categoria_serializada["_id"],
-                    "category_name": categoria_serializada["category_name"],
-                    "url_cat": f"/categoria/{categoria_serializada['category_name'].lower().replace(' ', '-')}"
-                })
-            
-            return jsonify(categorias)
+            return json_response(categorias)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # GET /api/categorias/ids
 @categorias_bp.route('/ids', methods=['GET'])
+@conditional('categorias')
+@cached_response(reference_cache, 'categorias/ids:')
 def get_categorias_with_ids():
     driver = get_driver()
     query = "MATCH (c:Category) RETURN c.id as _id, c.name as category_name ORDER BY c.name"
     
     try:
         with driver.session() as session:
-            result = session.run(query)
-            categorias = []
-            
-            for record in result:
-                categoria_data = dict(record)
-                categoria_serializada = serialize_neo4j_data(categoria_data)
-                categorias.append({
-                    "_id": categoria_serializada["_id"],
-                    "category_name": categoria_serializada["category_name"]
-                })
+            records, _ = run_read(session, query)
+            categorias = [record_to_dict(record) for record in records]
                 
-            return jsonify(categorias)
+            return json_response(categorias)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -82,42 +69,35 @@ def create_categoria():
         driver = get_driver()
         
         with driver.session() as session:
-            # Verificar duplicados
-            check_query = "MATCH (c:Category {name: $name}) RETURN count(c) as existe"
-            check_result = session.run(check_query, name=data['category_name']).single()
-            
-            if check_result["existe"] > 0:
-                return jsonify({"error": "Ese nombre de categoría ya existe"}), 409
-
-            # Obtener siguiente ID
-            id_query = "MATCH (c:Category) RETURN coalesce(max(c.id), 0) + 1 as nextId"
-            id_result = session.run(id_query).single()
-            new_id = id_result["nextId"]
-
-            # Crear categoría
+            # Verificar duplicados y crear en una sola sentencia.
+            # MERGE por 'name' (único, ver schema.py): si ya existía tiene otro id.
             create_query = """
-            CREATE (c:Category {
-                id: $id,
-                name: $name
-            }) 
-            RETURN c
+            MERGE (c:Category {name: $name})
+            ON CREATE SET c.id = $id,
+                          c.articleCount = 0
+            RETURN c, c.id = $id AS created
             """
             
-            insert_result = session.run(create_query, id=new_id, name=data['category_name']).single()
+            # El ID sale del bloque reservado por este proceso (id_allocator.py)
+            def create(new_id):
+                return run_write(session, create_query, then=bump('categorias'),
+                                 id=new_id, name=data['category_name'])
             
-            if insert_result:
-                category_node = insert_result["c"]
-                category_data = dict(category_node)
-                category_serializada = serialize_neo4j_data(category_data)
-                
-                new_cat = {
-                    '_id': category_serializada["id"],
-                    'category_name': category_serializada["name"],
-                    'url_cat': f"/categoria/{category_serializada['name'].lower().replace(' ', '-')}"
-                }
-                return jsonify(new_cat), 201
-            else:
-                return jsonify({"error": "No se pudo crear la categoría"}), 500
+            records, _ = create_with_id(session, 'Category', create)
+            reference_cache.invalidate('categorias')
+            
+            if not records[0]["created"]:
+                return jsonify({"error": "Ese nombre de categoría ya existe"}), 409
+            
+            category_serializada = serialize(records[0]["c"])
+            
+            new_cat = {
+                '_id': category_serializada["id"],
+                'category_name': category_serializada["name"],
+                'articleCount': category_serializada["articleCount"],
+                'url_cat': f"/categoria/{category_serializada['name'].lower().replace(' ', '-')}"
+            }
+            return jsonify(new_cat), 201
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -142,8 +122,13 @@ def update_categoria(originalName):
         """
         
         with driver.session() as session:
-            result = session.run(query, original_name=decoded_name, new_name=data['category_name'])
-            record = result.single()
+            records, _ = run_write(session, query, then=bump('categorias'),
+                                   original_name=decoded_name, new_name=data['category_name'])
+            record = records[0] if records else None
+            reference_cache.invalidate('categorias')
+            # Los artículos (también los relacionados) incluyen estos datos: se descartan sus copias
+            article_cache.invalidate('articulo:')
+            related_cache.invalidate('relacionados:')
             
             if not record:
                 return jsonify({"error": "Categoría no encontrada"}), 404
@@ -160,19 +145,22 @@ def delete_categoria(name):
         decoded_name = urllib.parse.unquote(name)
         driver = get_driver()
         
-        query = """
-        MATCH (c:Category {name: $name})
-        DETACH DELETE c
-        """
-        
         with driver.session() as session:
-            result = session.run(query, name=decoded_name)
-            summary = result.consume()
+            records, _ = run_read(session, "MATCH (c:Category {name: $name}) RETURN c.id", name=decoded_name)
             
-            if summary.counters.nodes_deleted == 0:
+            if not records:
                 return jsonify({"error": "Categoría no encontrada"}), 404
-            
-            return "", 204
+        
+        def on_done():
+            reference_cache.invalidate('categorias')
+            # Los artículos incluyen estos datos: se descartan sus copias
+            article_cache.invalidate('articulo:')
+            related_cache.invalidate('relacionados:')
+        
+        # Primero sus relaciones por lotes y después la categoría (cascade.py).
+        # Corre en segundo plano; el estado se consulta en /api/jobs/<job_id>.
+        job = start_cascade('categoria', on_done=on_done, resources=('categorias',), name=decoded_name)
+        return accepted(job)
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
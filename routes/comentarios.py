@@ -1,30 +1,29 @@
 from flask import Blueprint, request, jsonify
 from extensions import get_driver
-from datetime import datetime
+from id_allocator import create_with_id, allocate_ids
+from batch import (batch_args, validate_items, run_batch, batch_response,
+                   created_result, error_result)
+from transactions import run_read, run_write
+from pagination import (is_paginated, page_params, keyset_clause, limit_clause,
+                        cypher_params, split_page)
+from serialization import record_to_dict, json_response, wants_ndjson, ndjson_response
+from versions import conditional, bump
+from cache import related_cache
 
 comentarios_bp = Blueprint('comentarios', __name__)
 
-def serialize_neo4j_data(data):
-    """Función helper para serializar datos de Neo4j a JSON"""
-    if isinstance(data, dict):
-        return {key: serialize_neo4j_data(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [serialize_neo4j_data(item) for item in data]
-    elif hasattr(data, 'iso_format'):
-        return data.iso_format()
-    elif hasattr(data, 'to_native'):
-        return data.to_native()
-    else:
-        return data
-
-# GET /api/comentarios
-@comentarios_bp.route('', methods=['GET'])
-def get_comentarios():
-    driver = get_driver()
-    
-    # Query para obtener comentarios con información de usuario y artículo
-    query = """
-    MATCH (c:Comment)-[:ON_ARTICLE]->(a:Article)
+def comentarios_query(page, ordered=True):
+    """
+    Query para obtener comentarios con información de usuario y artículo.
+    Se elige la página (createdAt, id) antes de expandir, así las filas
+    salen en orden y se pueden transmitir conforme se producen.
+    Con ordered=False (exportación completa) no hay ORDER BY, como en articulos_query.
+    """
+    return f"""
+    MATCH (c:Comment)
+    {keyset_clause('c', page) if ordered else ''}
+    {limit_clause(page)}
+    MATCH (c)-[:ON_ARTICLE]->(a:Article)
     MATCH (u:User)-[:POSTED]->(c)
     RETURN c.id as _id,
            c.text as comment,
@@ -33,34 +32,73 @@ def get_comentarios():
            u.id as user_id,
            a.title as article_title,
            a.id as article_id
-    ORDER BY c.createdAt DESC
     """
+
+# GET /api/comentarios
+# Siempre paginado (por defecto 20): ?limit=20&after=<next_cursor>
+# ?format=ndjson sin 'limit' ni 'after' transmite todos los comentarios
+@comentarios_bp.route('', methods=['GET'])
+@conditional('comentarios', 'usuarios', 'articulos')
+def get_comentarios():
+    driver = get_driver()
+    ndjson = wants_ndjson(request)
+    
+    try:
+        page = page_params(request.args, always=not ndjson)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # ?format=ndjson: una línea JSON por comentario, con memoria constante.
+    # Sin 'limit' ni 'after' es una exportación completa (sin orden ni límite)
+    if ndjson:
+        query = comentarios_query(page, ordered=is_paginated(request.args))
+        return ndjson_response(query, cypher_params(page, extra=0))
+    
+    query = comentarios_query(page)
     
     try:
         with driver.session() as session:
-            result = session.run(query)
-            comentarios = []
-            
-            for record in result:
-                comentario_data = dict(record)
-                comentario_serializado = serialize_neo4j_data(comentario_data)
-                
-                comentarios.append({
-                    "_id": comentario_serializado["_id"],
-                    "comment": comentario_serializado["comment"],
-                    "created_at": comentario_serializado["created_at"],
-                    "user_name": comentario_serializado["user_name"],
-                    "user_id": comentario_serializado["user_id"],
-                    "article_title": comentario_serializado["article_title"],
-                    "article_id": comentario_serializado["article_id"]
-                })
-            
-            return jsonify(comentarios)
+            records, _ = run_read(session, query, **cypher_params(page))
+            comentarios = [record_to_dict(record) for record in records]
+            comentarios, next_cursor = split_page(comentarios, page, "created_at", "_id")
+            return json_response({
+                "comentarios": comentarios,
+                "next_cursor": next_cursor
+            })
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # POST /api/comentarios
+# Verificación de artículo y usuario, creación y lectura en una sola sentencia.
+# CREATE (no MERGE) sobre el id asignado: si ese id ya existe, la restricción de
+# unicidad rechaza la sentencia en lugar de colgar la relación de otro comentario.
+CREATE_COMENTARIO_QUERY = """
+OPTIONAL MATCH (a:Article {id: $article_id})
+OPTIONAL MATCH (u:User {id: $user_id})
+CALL {
+    WITH a, u
+    WITH a, u WHERE a IS NOT NULL AND u IS NOT NULL
+    CREATE (c:Comment {id: $id,
+                       text: $text,
+                       createdAt: datetime()})
+    CREATE (u)-[:POSTED]->(c)
+    CREATE (c)-[:ON_ARTICLE]->(a)
+    SET a.commentCount = coalesce(a.commentCount, 0) + 1
+    RETURN collect(c) AS created
+}
+WITH a, u, created[0] AS c
+RETURN a IS NOT NULL as article_exists,
+       u IS NOT NULL as user_exists,
+       c.id as _id,
+       c.text as comment,
+       c.createdAt as created_at,
+       u.name as user_name,
+       u.id as user_id,
+       a.title as article_title,
+       a.id as article_id
+"""
+
 @comentarios_bp.route('', methods=['POST'])
 def create_comentario():
     data = request.get_json()
@@ -72,85 +110,92 @@ def create_comentario():
             return jsonify({"error": "Faltan campos requeridos: articulo_id y texto_com"}), 400
         
         with driver.session() as session:
-            # Obtener el siguiente ID para el comentario
-            id_query = "MATCH (c:Comment) RETURN coalesce(max(c.id), 0) + 1 as nextId"
-            id_result = session.run(id_query).single()
-            new_id = id_result["nextId"]
+            # El ID del comentario sale del bloque reservado en el contador
+            def create(new_id):
+                return run_write(session, CREATE_COMENTARIO_QUERY,
+                                 then=bump('comentarios'),
+                                 id=new_id,
+                                 text=data.get('texto_com'),
+                                 user_id=data.get('user_id', 0),
+                                 article_id=data.get('articulo_id'))
             
-            # Verificar que el artículo existe
-            article_check = "MATCH (a:Article {id: $article_id}) RETURN a"
-            article_result = session.run(article_check, article_id=data.get('articulo_id')).single()
+            records, _ = create_with_id(session, 'Comment', create)
+            comentario = record_to_dict(records[0])
             
-            if not article_result:
+            if not comentario.pop("article_exists"):
                 return jsonify({"error": "El artículo especificado no existe"}), 404
             
-            # Verificar que el usuario existe
-            user_check = "MATCH (u:User {id: $user_id}) RETURN u"
-            user_result = session.run(user_check, user_id=data.get('user_id', 0)).single()
-            
-            if not user_result:
+            if not comentario.pop("user_exists"):
                 return jsonify({"error": "El usuario especificado no existe"}), 404
             
-            # Crear el comentario
-            create_query = """
-            CREATE (c:Comment {
-                id: $id,
-                text: $text,
-                createdAt: datetime()
-            })
-            WITH c
-            MATCH (u:User {id: $user_id})
-            MATCH (a:Article {id: $article_id})
-            MERGE (u)-[:POSTED]->(c)
-            MERGE (c)-[:ON_ARTICLE]->(a)
-            RETURN c
-            """
-            
-            result = session.run(create_query, 
-                               id=new_id,
-                               text=data.get('texto_com'),
-                               user_id=data.get('user_id', 0),
-                               article_id=data.get('articulo_id'))
-            
-            if result.single():
-                # Recuperar el comentario creado con toda la información
-                get_query = """
-                MATCH (c:Comment {id: $id})-[:ON_ARTICLE]->(a:Article)
-                MATCH (u:User)-[:POSTED]->(c)
-                RETURN c.id as _id,
-                       c.text as comment,
-                       c.createdAt as created_at,
-                       u.name as user_name,
-                       u.id as user_id,
-                       a.title as article_title,
-                       a.id as article_id
-                """
-                
-                comment_result = session.run(get_query, id=new_id).single()
-                
-                if comment_result:
-                    comment_data = dict(comment_result)
-                    comment_serializado = serialize_neo4j_data(comment_data)
-                    
-                    new_comment = {
-                        "_id": comment_serializado["_id"],
-                        "comment": comment_serializado["comment"],
-                        "created_at": comment_serializado["created_at"],
-                        "user_name": comment_serializado["user_name"],
-                        "user_id": comment_serializado["user_id"],
-                        "article_title": comment_serializado["article_title"],
-                        "article_id": comment_serializado["article_id"]
-                    }
-                    
-                    return jsonify(new_comment), 201
-                else:
-                    return jsonify({"error": "No se pudo recuperar el comentario creado"}), 500
-            else:
-                return jsonify({"error": "No se pudo crear el comentario"}), 500
+            # Los comentaristas en común cuentan para los relacionados (related.py)
+            related_cache.invalidate('relacionados:')
+            return json_response(comentario, 201)
                 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# POST /api/comentarios/batch
+# Espera: [{ articulo_id, user_id, texto_com }, ...]. Opcional: ?chunk_size=500
+CREATE_COMENTARIOS_BATCH_QUERY = """
+UNWIND $rows AS row
+OPTIONAL MATCH (a:Article {id: row.articulo_id})
+OPTIONAL MATCH (u:User {id: row.user_id})
+CALL {
+    WITH row, a, u
+    WITH row, a, u WHERE a IS NOT NULL AND u IS NOT NULL
+    CREATE (c:Comment {id: row.id,
+                       text: row.texto_com,
+                       createdAt: datetime()})
+    CREATE (u)-[:POSTED]->(c)
+    CREATE (c)-[:ON_ARTICLE]->(a)
+    SET a.commentCount = coalesce(a.commentCount, 0) + 1
+    RETURN count(c) AS created
+}
+RETURN row.index AS index,
+       row.id AS id,
+       a IS NOT NULL AS article_exists,
+       u IS NOT NULL AS user_exists,
+       created > 0 AS created
+"""
+
+@comentarios_bp.route('/batch', methods=['POST'])
+def create_comentarios_batch():
+    try:
+        items, chunk_size = batch_args(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def validate(item):
+        if not item.get('articulo_id') or not item.get('texto_com'):
+            return "Faltan campos requeridos: articulo_id y texto_com"
+    
+    def to_result(record):
+        if not record["article_exists"]:
+            return error_result(record["index"], "El artículo especificado no existe")
+        if not record["user_exists"]:
+            return error_result(record["index"], "El usuario especificado no existe")
+        return created_result(record["index"], record["id"])
+    
+    rows, results = validate_items(items, validate, ('articulo_id', 'user_id', 'texto_com'))
+    for row in rows:
+        # Mismo valor por defecto que create_comentario
+        row["user_id"] = row["user_id"] if row["user_id"] is not None else 0
+    
+    driver = get_driver()
+    try:
+        with driver.session() as session:
+            # Un solo bloque de IDs para todo el lote
+            for row, new_id in zip(rows, allocate_ids(session, 'Comment', len(rows))):
+                row["id"] = new_id
+            results += run_batch(session, CREATE_COMENTARIOS_BATCH_QUERY, rows, chunk_size, to_result,
+                                 then=bump('comentarios'))
+            related_cache.invalidate('relacionados:')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    return json_response(batch_response(results))
+
 # DELETE /api/comentarios/<id>
 @comentarios_bp.route('/<int:id>', methods=['DELETE'])
 def delete_comentario(id):
@@ -158,18 +203,24 @@ def delete_comentario(id):
     
     try:
         with driver.session() as session:
-            # Eliminar el comentario y todas sus relaciones
+            # Eliminar el comentario y todas sus relaciones,
+            # descontándolo del commentCount de su artículo en la misma transacción
             query = """
             MATCH (c:Comment {id: $id})
+            CALL {
+                WITH c
+                MATCH (c)-[:ON_ARTICLE]->(a:Article)
+                SET a.commentCount = CASE WHEN coalesce(a.commentCount, 0) > 0 THEN a.commentCount - 1 ELSE 0 END
+            }
             DETACH DELETE c
             """
             
-            result = session.run(query, id=id)
-            summary = result.consume()
+            _, summary = run_write(session, query, then=bump('comentarios'), id=id)
             
             if summary.counters.nodes_deleted == 0:
                 return jsonify({"error": "Comentario no encontrado"}), 404
-                
+            
+            related_cache.invalidate('relacionados:')
             return "", 204
             
     except Exception as e:
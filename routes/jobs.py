@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from cascade import get_job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# GET /api/jobs/<job_id>
+# Estado de un borrado en cascada: pending, running, done o failed,
+# con lo borrado en cada paso hasta el momento (desde cualquier worker)
+@jobs_bp.route('/<string:job_id>', methods=['GET'])
+def get_job_status(job_id):
+    try:
+        job = get_job(job_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    
+    return jsonify(job)
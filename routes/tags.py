@@ -1,26 +1,35 @@
 from flask import Blueprint, jsonify, request
 from extensions import get_driver
+from id_allocator import create_with_id, allocate_ids
+from batch import (batch_args, validate_items, run_batch, batch_response,
+                   created_result, error_result)
+from transactions import run_read, run_write
+from cache import reference_cache, article_cache, related_cache, cached_response
+from cascade import start_cascade, accepted
+from versions import conditional, bump
+from serialization import serialize, record_to_dict, json_response
+from pagination import MAX_LIMIT
 import urllib.parse
 
 tags_bp = Blueprint('tags', __name__)
 
+# Recuperamos todos los nodos con la etiqueta Tag
+TAGS_QUERY = "MATCH (t:Tag) RETURN t"
+
 # GET /api/tags
 @tags_bp.route('', methods=['GET'], strict_slashes=False)
+@conditional('tags')
+@cached_response(reference_cache, 'tags:')
 def get_tags():
     driver = get_driver()
-    # Recuperamos todos los nodos con la etiqueta Tag
-    query = "MATCH (t:Tag) RETURN t"
     
     try:
         with driver.session() as session:
-            result = session.run(query)
+            records, _ = run_read(session, TAGS_QUERY)
             
-            tags = []
-            for record in result:
-                # Convertimos el nodo a diccionario
-                tag_data = dict(record["t"])
-                tags.append(tag_data)
-            return jsonify(tags)
+            # Convertimos cada nodo a diccionario
+            tags = [serialize(record["t"]) for record in records]
+            return json_response(tags)
             
     except Exception as e:
         return jsonify(error=str(e)), 500
@@ -29,7 +38,6 @@ def get_tags():
 @tags_bp.route('', methods=['POST'], strict_slashes=False)
 def create_tag():
     data = request.get_json() # Espera: { tname, tagurl }
-    print(data)
     # 1. Validar campos
     if 'name' not in data or 'url' not in data:
         return jsonify({"error": "Faltan los campos 'name' y 'url'"}), 400
@@ -40,43 +48,79 @@ def create_tag():
     
     try:
         with driver.session() as session:
-            # 2. Verificar duplicados
-            # Buscamos si existe un Tag con ese tname
-            check_query = "MATCH (t:Tag {name: $name}) RETURN count(t) as existe"
-            check_result = session.run(check_query, name=name).single()
-            
-            if check_result["existe"] > 0:
-                return jsonify({"error": "Ese 'name' de tag ya existe"}), 409
-
-            # 3. Insertar
-            # 3.1 Buscamos el ID más alto actual
-            # COALESCE es para que si no hay tags (devuelve null), use 0 por defecto.
-            id_query = "MATCH (t:Tag) RETURN coalesce(max(t.id), 0) + 1 as nextId"
-            id_result = session.run(id_query).single()
-            
-            # Este es tu nuevo ID (ej: si el max era 10, ahora new_id es 11)
-            new_id = id_result["nextId"]
-            # Nota: Guardamos las propiedades 'tname' y 'tagurl' tal cual las pide el frontend.
+            # 2. Verificar duplicados e insertar en una sola sentencia.
+            # MERGE por 'name' (único, ver schema.py): si el tag ya existía conserva
+            # otro id y respondemos 409; si es un reintento de esta misma creación
+            # el id coincide y se responde 201.
             create_query = """
-            CREATE (t:Tag {
-                id: $id,
-                name: $name, 
-                url: $url
-            }) 
-            RETURN t
+            MERGE (t:Tag {name: $name})
+            ON CREATE SET t.id = $id,
+                          t.url = $url,
+                          t.articleCount = 0
+            RETURN t, t.id = $id AS created
             """
             
-            insert_result = session.run(create_query, id=new_id, name=name, url=url).single()
+            # 3. El ID sale del bloque reservado por este proceso (id_allocator.py);
+            # solo va a la base cuando se agota.
+            def create(new_id):
+                return run_write(session, create_query, then=bump('tags'),
+                                 id=new_id, name=name, url=url)
             
-            if insert_result:
-                new_tag = dict(insert_result["t"])
-                return jsonify(new_tag), 201
-            else:
-                return jsonify({"error": "No se pudo crear el tag"}), 500
+            records, _ = create_with_id(session, 'Tag', create)
+            reference_cache.invalidate('tags')
+            
+            if not records[0]["created"]:
+                return jsonify({"error": "Ese 'name' de tag ya existe"}), 409
+            
+            new_tag = serialize(records[0]["t"])
+            return json_response(new_tag, 201)
                 
     except Exception as e:
         return jsonify(error=str(e)), 500
 
+# POST /api/tags/batch
+# Espera: [{ name, url }, ...]. Opcional: ?chunk_size=500
+@tags_bp.route('/batch', methods=['POST'])
+def create_tags_batch():
+    try:
+        items, chunk_size = batch_args(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def validate(item):
+        if 'name' not in item or 'url' not in item:
+            return "Faltan los campos 'name' y 'url'"
+    
+    def to_result(record):
+        if record["created"]:
+            return created_result(record["index"], record["id"])
+        return error_result(record["index"], "Ese 'name' de tag ya existe")
+    
+    rows, results = validate_items(items, validate, ('name', 'url'))
+    
+    # Igual que create_tag, pero con UNWIND: un viaje a la base por lote
+    query = """
+    UNWIND $rows AS row
+    MERGE (t:Tag {name: row.name})
+    ON CREATE SET t.id = row.id,
+                  t.url = row.url,
+                  t.articleCount = 0
+    RETURN row.index AS index, t.id AS id, t.id = row.id AS created
+    """
+    
+    driver = get_driver()
+    try:
+        with driver.session() as session:
+            # Un solo bloque de IDs para todo el lote
+            for row, new_id in zip(rows, allocate_ids(session, 'Tag', len(rows))):
+                row["id"] = new_id
+            results += run_batch(session, query, rows, chunk_size, to_result, then=bump('tags'))
+            reference_cache.invalidate('tags')
+    except Exception as e:
+        return jsonify(error=str(e)), 500
+    
+    return json_response(batch_response(results))
+
 # PUT /api/tags/<tname>
 @tags_bp.route('/<string:name>', methods=['PUT'])
 def update_tag(name):
@@ -101,8 +145,13 @@ def update_tag(name):
         """
         
         with driver.session() as session:
-            result = session.run(query, original_name=decoded_name, props=data)
-            record = result.single()
+            records, _ = run_write(session, query, then=bump('tags'),
+                                   original_name=decoded_name, props=data)
+            record = records[0] if records else None
+            reference_cache.invalidate('tags')
+            # Los artículos (también los relacionados) incluyen estos datos: se descartan sus copias
+            article_cache.invalidate('articulo:')
+            related_cache.invalidate('relacionados:')
             
             if not record:
                 return jsonify({"error": "Tag no encontrado"}), 404
@@ -120,50 +169,76 @@ def delete_tag(tname):
     try:
         decoded_name = urllib.parse.unquote(tname)
         driver = get_driver()
-        print(decoded_name)
-        
-        # 3. Eliminar
-        query = """
-        MATCH (t:Tag {name: $name})
-        DETACH DELETE t
-        """
         
         with driver.session() as session:
-            result = session.run(query, name=decoded_name)
-            summary = result.consume()
+            records, _ = run_read(session, "MATCH (t:Tag {name: $name}) RETURN t.id", name=decoded_name)
             
-            if summary.counters.nodes_deleted == 0:
+            if not records:
                 return jsonify({"error": "Tag no encontrado"}), 404
-            
-            return "", 204 # Éxito sin contenido
+        
+        def on_done():
+            reference_cache.invalidate('tags')
+            # Los artículos incluyen estos datos: se descartan sus copias
+            article_cache.invalidate('articulo:')
+            related_cache.invalidate('relacionados:')
+        
+        # 3. Eliminar: primero sus relaciones por lotes y después el tag (cascade.py).
+        # Corre en segundo plano; el estado se consulta en /api/jobs/<job_id>.
+        job = start_cascade('tag', on_done=on_done, resources=('tags',), name=decoded_name)
+        return accepted(job)
             
     except Exception as e:
         return jsonify(error=str(e)), 500
 
+# GET /api/tags/top
+# Tags con más artículos: ?limit=10. Lee el contador articleCount, sin recorrer artículos.
+@tags_bp.route('/top', methods=['GET'])
+@conditional('tags')
+@cached_response(reference_cache, 'tags/top:')
+def get_top_tags():
+    driver = get_driver()
+    
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"error": "El parámetro 'limit' debe ser un entero"}), 400
+    if limit < 1 or limit > MAX_LIMIT:
+        return jsonify({"error": f"El parámetro 'limit' debe estar entre 1 y {MAX_LIMIT}"}), 400
+    
+    query = """
+    MATCH (t:Tag)
+    RETURN t.id as _id,
+           t.name as tname,
+           t.url as url,
+           coalesce(t.articleCount, 0) as articleCount
+    ORDER BY articleCount DESC, tname
+    LIMIT $limit
+    """
+    
+    try:
+        with driver.session() as session:
+            records, _ = run_read(session, query, limit=limit)
+            tags = [record_to_dict(record) for record in records]
+            
+            return json_response(tags)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # GET /api/tags/ids
 @tags_bp.route('/ids', methods=['GET'])
+@conditional('tags')
+@cached_response(reference_cache, 'tags/ids:')
 def get_tags_with_ids():
     driver = get_driver()
     query = "MATCH (t:Tag) RETURN t.id as _id, t.name as tname ORDER BY t.name"
     
     try:
         with driver.session() as session:
-            result = session.run(query)
-            tags = []
-            
-            for record in result:
-                tag_data = dict(record)
-                # Asegurarnos de que estamos serializando correctamente
-                tag_serializado = {
-                    "_id": tag_data.get("_id"),
-                    "tname": tag_data.get("tname")
-                }
-                tags.append(tag_serializado)
-                
+            records, _ = run_read(session, query)
+            tags = [record_to_dict(record) for record in records]
             
-            return jsonify(tags)
+            return json_response(tags)
     except Exception as e:
-        print(f"Error en /tags/ids: {e}")  # Debug
         return jsonify({"error": str(e)}), 500
 
 # PUT /api/tags/<tname> (Usamos 'tname' para consistencia)
@@ -1,11 +1,21 @@
 from flask import Blueprint, jsonify, request
 from extensions import get_driver
+from id_allocator import create_with_id, allocate_ids
+from batch import (batch_args, validate_items, run_batch, batch_response,
+                   created_result, error_result)
+from transactions import run_read, run_write
+from cache import reference_cache, article_cache, related_cache, cached_response
+from cascade import start_cascade, accepted
+from versions import conditional, bump
+from serialization import serialize, json_response
 import urllib.parse
 
 usuarios_bp = Blueprint('usuarios_bp', __name__)
 
 # GET /api/usuarios
 @usuarios_bp.route('', methods=['GET'], strict_slashes=False)
+@conditional('usuarios')
+@cached_response(reference_cache, 'usuarios:')
 def get_usuarios():
     driver = get_driver()
     
@@ -14,15 +24,15 @@ def get_usuarios():
     
     try:
         with driver.session() as session:
-            result = session.run(query)
+            records, _ = run_read(session, query)
             
             # Transformación:
-            # 1. Iteramos sobre el cursor (result)
+            # 1. Iteramos sobre los registros leídos en la transacción
             # 2. record["u"] nos da el Nodo
-            # 3. dict(record["u"]) convierte las propiedades del nodo a un diccionario de Python
-            usuarios = [dict(record["u"]) for record in result]
+            # 3. serialize(record["u"]) convierte las propiedades del nodo a un diccionario de Python
+            usuarios = [serialize(record["u"]) for record in records]
             
-            return jsonify(usuarios)
+            return json_response(usuarios)
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -35,52 +45,84 @@ def create_usuario():
     # 1. Validar datos de entrada
     if 'user_name' not in data or 'email' not in data:
         return jsonify({"error": "Faltan los campos 'name' y 'email'"}), 400
-    print(data)
     driver = get_driver()
     email = data['email']
     name = data['user_name']
     
     try:
         with driver.session() as session:
-            
-            # 2. Verificar si el email ya existe
-            # Usamos COUNT para ser más eficientes que traer todo el nodo
-            check_query = "MATCH (u:User {email: $email}) RETURN count(u) as existe"
-            check_result = session.run(check_query, email=email).single()
-            
-            if check_result["existe"] > 0:
-                return jsonify({"error": "El email ya existe"}), 409
-
-            # 3. Crear el usuario
-            # 3.1 Buscamos el ID más alto actual
-            # COALESCE es para que si no hay tags (devuelve null), use 0 por defecto.
-            id_query = "MATCH (t:User) RETURN coalesce(max(t.id), 0) + 1 as nextId"
-            id_result = session.run(id_query).single()
-            
-            # Este es tu nuevo ID (ej: si el max era 10, ahora new_id es 11)
-            new_id = id_result["nextId"]
+            # 2. Verificar si el email ya existe y crear el usuario en una sola sentencia.
+            # MERGE por 'email' (único, ver schema.py): si el usuario ya existía
+            # conserva otro id y respondemos 409.
             create_query = """
-            CREATE (u:User {
-                id: $id, 
-                name: $name, 
-                email: $email
-            }) 
-            RETURN u
+            MERGE (u:User {email: $email})
+            ON CREATE SET u.id = $id,
+                          u.name = $name
+            RETURN u, u.id = $id AS created
             """
             
+            # 3. El ID sale del bloque reservado por este proceso (id_allocator.py);
+            # solo va a la base cuando se agota.
             # Ejecutamos pasando las variables para evitar inyección
-            insert_result = session.run(create_query, id=new_id, name=name, email=email).single()
+            def create(new_id):
+                return run_write(session, create_query, then=bump('usuarios'),
+                                 id=new_id, name=name, email=email)
+            
+            records, _ = create_with_id(session, 'User', create)
+            reference_cache.invalidate('usuarios')
+            
+            if not records[0]["created"]:
+                return jsonify({"error": "El email ya existe"}), 409
             
-            if insert_result:
-                # Convertimos el nodo creado a diccionario para responder
-                new_user = dict(insert_result["u"])
-                return jsonify(new_user), 201
-            else:
-                return jsonify({"error": "No se pudo crear el usuario"}), 500
+            # Convertimos el nodo creado a diccionario para responder
+            new_user = serialize(records[0]["u"])
+            return json_response(new_user, 201)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# POST /api/usuarios/batch
+# Espera: [{ user_name, email }, ...]. Opcional: ?chunk_size=500
+@usuarios_bp.route('/batch', methods=['POST'])
+def create_usuarios_batch():
+    try:
+        items, chunk_size = batch_args(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def validate(item):
+        if 'user_name' not in item or 'email' not in item:
+            return "Faltan los campos 'name' y 'email'"
+    
+    def to_result(record):
+        if record["created"]:
+            return created_result(record["index"], record["id"])
+        return error_result(record["index"], "El email ya existe")
+    
+    rows, results = validate_items(items, validate, ('user_name', 'email'))
+    
+    # Igual que create_usuario, pero con UNWIND: un viaje a la base por lote
+    query = """
+    UNWIND $rows AS row
+    MERGE (u:User {email: row.email})
+    ON CREATE SET u.id = row.id,
+                  u.name = row.user_name
+    RETURN row.index AS index, u.id AS id, u.id = row.id AS created
+    """
+    
+    driver = get_driver()
+    try:
+        with driver.session() as session:
+            # Un solo bloque de IDs para todo el lote
+            for row, new_id in zip(rows, allocate_ids(session, 'User', len(rows))):
+                row["id"] = new_id
+            results += run_batch(session, query, rows, chunk_size, to_result, then=bump('usuarios'))
+            reference_cache.invalidate('usuarios')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    return json_response(batch_response(results))
+
 # PUT /api/usuarios/<originalEmail>
 @usuarios_bp.route('/<string:originalEmail>', methods=['PUT'])
 def update_usuario(originalEmail):
@@ -88,7 +130,6 @@ def update_usuario(originalEmail):
         data = request.get_json()
         # Decodificar el email de la URL (ej: carlos%40gmail.com -> carlos@gmail.com)
         decoded_email = urllib.parse.unquote(originalEmail)
-        print(data)
         updates = {}
         # Mantenemos tu lógica de flags booleanas
         if data.get('name_bool') == 1:
@@ -113,10 +154,15 @@ def update_usuario(originalEmail):
         """
         
         with driver.session() as session:
-            result = session.run(query, original_email=decoded_email, props=updates)
+            records, _ = run_write(session, query, then=bump('usuarios'),
+                                   original_email=decoded_email, props=updates)
             
             # Intentamos obtener el primer resultado
-            record = result.single()
+            record = records[0] if records else None
+            reference_cache.invalidate('usuarios')
+            # Los artículos (también los relacionados) incluyen estos datos: se descartan sus copias
+            article_cache.invalidate('articulo:')
+            related_cache.invalidate('relacionados:')
             
             if not record:
                 # Si record es None, significa que el MATCH no encontró al usuario
@@ -129,37 +175,33 @@ def update_usuario(originalEmail):
 
 
 # DELETE /api/usuarios/<email>
+# Borra al usuario, sus comentarios, sus artículos y los comentarios de esos artículos.
+# El borrado corre en segundo plano por lotes (cascade.py): se responde 202 con
+# el trabajo, cuyo estado se consulta en /api/jobs/<job_id>.
 @usuarios_bp.route('/<string:email>', methods=['DELETE'])
 def delete_usuario(email):
     try:
         decoded_email = urllib.parse.unquote(email)
         driver = get_driver()
         
-        # Cypher Query:
-        # DETACH DELETE: "Desconecta y Borra".
-        # Si el usuario escribió comentarios o artículos, esas FLECHAS se borran,
-        # y luego se borra el nodo Usuario.
-        # (Nota: Los artículos y comentarios quedan huérfanos, no se borran ellos, solo el autor).
-        query = """
-        MATCH (u:User {email: $email})
-        OPTIONAL MATCH (u)-[:POSTED]->(c:Comment)
-        OPTIONAL MATCH (u)-[:WROTE]->(a:Article)
-        OPTIONAL MATCH (a)<-[:ON_ARTICLE]-(ca:Comment)
-        DETACH DELETE u, c, a, ca
-        """
-        
         with driver.session() as session:
-            result = session.run(query, email=decoded_email)
-            
-            # ¿Cómo sabemos si borró algo?
-            # Consultamos las estadísticas de la transacción (summary counters)
-            summary = result.consume()
-            nodes_deleted = summary.counters.nodes_deleted
+            records, _ = run_read(session, "MATCH (u:User {email: $email}) RETURN u.id", email=decoded_email)
             
-            if nodes_deleted == 0:
+            if not records:
                 return jsonify({"error": "Usuario no encontrado"}), 404
-            
-            return "", 204 # 204 No Content (éxito)
+        
+        def on_done():
+            reference_cache.invalidate('usuarios')
+            # Se borraron artículos y cambiaron los contadores de tags y categorías
+            reference_cache.invalidate('tags')
+            reference_cache.invalidate('categorias')
+            article_cache.invalidate('articulo:')
+            related_cache.invalidate('relacionados:')
+        
+        job = start_cascade('usuario', on_done=on_done,
+                            resources=('usuarios', 'articulos', 'comentarios', 'tags', 'categorias'),
+                            email=decoded_email)
+        return accepted(job)
             
     except Exception as e:
         return jsonify(error=str(e)), 500
\ No newline at end of file
@@ -0,0 +1,144 @@
+from extensions import get_driver
+from transactions import run_write
+from search import ARTICLE_INDEX, COMMENT_INDEX
+
+# (etiqueta, propiedad, tipo): 'unique' crea una restricción de unicidad,
+# 'range' un índice de rango. Son las propiedades por las que buscan u ordenan las rutas.
+SCHEMA = [
+    ('User', 'id', 'unique'),
+    ('Tag', 'id', 'unique'),
+    ('Category', 'id', 'unique'),
+    ('Article', 'id', 'unique'),
+    ('Comment', 'id', 'unique'),
+    ('IdCounter', 'label', 'unique'),
+    ('CascadeJob', 'id', 'unique'),
+    ('CascadeJob', 'finishedAt', 'range'),
+    ('ChangeVersion', 'resource', 'unique'),
+    ('Tag', 'name', 'unique'),
+    ('Category', 'name', 'unique'),
+    ('User', 'email', 'unique'),
+    ('Article', 'createdAt', 'range'),
+    ('Comment', 'createdAt', 'range'),
+]
+
+# Índices de texto completo para /api/articulos/search: nombre -> (etiqueta, propiedades)
+FULLTEXT = {
+    ARTICLE_INDEX: ('Article', ('title', 'content')),
+    COMMENT_INDEX: ('Comment', ('text',)),
+}
+
+
+def _schema_name(label, prop, kind):
+    return f"{label.lower()}_{prop.lower()}_{kind}"
+
+
+def existing_indexes(session):
+    """Conjunto de (etiqueta, propiedad) que ya tienen un índice de una sola propiedad"""
+    query = """
+    SHOW INDEXES YIELD labelsOrTypes, properties, entityType, type
+    WHERE entityType = 'NODE' AND type <> 'FULLTEXT'
+      AND size(properties) = 1 AND labelsOrTypes IS NOT NULL
+    RETURN labelsOrTypes[0] AS label, properties[0] AS prop
+    """
+    return {(record["label"], record["prop"]) for record in session.run(query)}
+
+
+def existing_fulltext(session):
+    """Nombres de los índices de texto completo que ya existen"""
+    query = "SHOW INDEXES YIELD name, type WHERE type = 'FULLTEXT' RETURN name"
+    return {record["name"] for record in session.run(query)}
+
+
+def missing_indexes(driver=None):
+    """Lista de índices de SCHEMA y FULLTEXT que aún no existen en la base"""
+    driver = driver or get_driver()
+    with driver.session() as session:
+        existing = existing_indexes(session)
+        fulltext = existing_fulltext(session)
+    missing = [
+        {"label": label, "property": prop, "type": kind}
+        for label, prop, kind in SCHEMA
+        if (label, prop) not in existing
+    ]
+    missing += [
+        {"label": label, "property": ",".join(props), "type": "fulltext"}
+        for name, (label, props) in FULLTEXT.items()
+        if name not in fulltext
+    ]
+    return missing
+
+
+def ensure_schema(driver=None):
+    """
+    Crea de forma idempotente los índices y restricciones de SCHEMA.
+    Si una restricción de unicidad no se puede crear (p. ej. hay duplicados),
+    se crea un índice de rango para que la búsqueda siga siendo por índice.
+    Devuelve la lista de lo que sigue faltando.
+    """
+    driver = driver or get_driver()
+    with driver.session() as session:
+        existing = existing_indexes(session)
+
+        for label, prop, kind in SCHEMA:
+            if (label, prop) in existing:
+                continue
+
+            name = _schema_name(label, prop, kind)
+            if kind == 'unique':
+                query = (f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                         f"FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE")
+            else:
+                query = f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+
+            try:
+                session.run(query).consume()
+            except Exception as e:
+                print(f"No se pudo crear {name}: {e}")
+                if kind == 'unique':
+                    fallback = _schema_name(label, prop, 'range')
+                    session.run(f"CREATE INDEX {fallback} IF NOT EXISTS "
+                                f"FOR (n:{label}) ON (n.{prop})").consume()
+
+        for name, (label, props) in FULLTEXT.items():
+            properties = ", ".join(f"n.{prop}" for prop in props)
+            try:
+                session.run(f"CREATE FULLTEXT INDEX {name} IF NOT EXISTS "
+                            f"FOR (n:{label}) ON EACH [{properties}]").consume()
+            except Exception as e:
+                print(f"No se pudo crear {name}: {e}")
+
+    missing = missing_indexes(driver)
+    for index in missing:
+        print(f"Índice faltante: :{index['label']}({index['property']}) [{index['type']}]")
+    return missing
+
+
+# createdAt se guarda siempre como DateTime, igual que en las rutas (datetime()).
+# Las semillas anteriores usaban date(): en Cypher, comparar Date con DateTime da null
+# y al ordenar quedan separados, lo que rompe la paginación por (createdAt, id).
+# Cada lote convierte a lo más $batch nodos (la fecha queda a medianoche UTC).
+NORMALIZE_CREATED_AT = {
+    label: f"""
+    MATCH (n:{label})
+    WHERE n.createdAt IS :: DATE
+    WITH n LIMIT $batch
+    SET n.createdAt = datetime({{date: n.createdAt, timezone: 'UTC'}})
+    RETURN count(*) AS updated
+    """
+    for label in ('Article', 'Comment')
+}
+
+
+def normalize_created_at(driver=None, batch_size=10000):
+    """Convierte a DateTime los createdAt guardados como Date. Devuelve cuántos cambió"""
+    driver = driver or get_driver()
+    total = 0
+    with driver.session() as session:
+        for query in NORMALIZE_CREATED_AT.values():
+            while True:
+                records, _ = run_write(session, query, batch=batch_size)
+                updated = records[0]["updated"] if records else 0
+                total += updated
+                if updated < batch_size:
+                    break
+    return total
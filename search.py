@@ -0,0 +1,78 @@
+import html
+import os
+import re
+
+# Índices de texto completo (ver schema.py)
+ARTICLE_INDEX = 'articulo_texto_fulltext'
+COMMENT_INDEX = 'comentario_texto_fulltext'
+
+# Largo aproximado (en caracteres) del extracto con las coincidencias
+EXCERPT_LENGTH = 150
+
+# Coincidencias de comentarios que se piden por cada artículo del resultado:
+# un artículo con varios comentarios que coinciden no deja la página corta
+COMMENT_OVERFETCH = int(os.environ.get('SEARCH_COMMENT_OVERFETCH', 10))
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def query_terms(q):
+    """Palabras de la búsqueda en minúsculas y sin repetir"""
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(q or '')))
+
+
+def lucene_query(terms):
+    """
+    Consulta para el índice de texto completo.
+    Solo se usan palabras, así los caracteres especiales de Lucene
+    que escriba el usuario no rompen la consulta; en minúsculas para que
+    'AND'/'OR'/'NOT' no se interpreten como operadores.
+    """
+    return ' '.join(terms)
+
+
+def _terms_pattern(terms):
+    # Palabras completas, igual que los tokens del índice
+    return re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in terms) + r')\b', re.IGNORECASE)
+
+
+def highlight(text, terms):
+    """
+    Texto con las coincidencias marcadas con <mark> (el resto escapado como HTML).
+    Se busca en el texto original y se escapa cada parte por separado, así un término
+    no coincide dentro de una entidad como '&amp;'.
+    """
+    text = text or ''
+    if not terms:
+        return html.escape(text)
+    parts = []
+    end = 0
+    for match in _terms_pattern(terms).finditer(text):
+        parts.append(html.escape(text[end:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group(0))}</mark>")
+        end = match.end()
+    parts.append(html.escape(text[end:]))
+    return ''.join(parts)
+
+
+def excerpt(text, terms, length=EXCERPT_LENGTH):
+    """
+    Fragmento de ~length caracteres alrededor de la primera coincidencia,
+    con las coincidencias marcadas. Sin coincidencia se toma el inicio del texto.
+    """
+    text = text or ''
+    start = 0
+    if terms:
+        match = _terms_pattern(terms).search(text)
+        if match:
+            # La coincidencia queda en el primer tercio del extracto
+            start = max(0, match.start() - length // 3)
+            # Empezar en un límite de palabra
+            if start > 0:
+                space = text.rfind(' ', 0, start)
+                start = space + 1 if space != -1 else start
+
+    fragment = text[start:start + length]
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if start + length < len(text) else ""
+    return prefix + highlight(fragment, terms) + suffix
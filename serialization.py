@@ -0,0 +1,101 @@
+import json
+
+from flask import Response, stream_with_context
+from neo4j import READ_ACCESS
+from neo4j.graph import Node, Relationship
+
+from extensions import get_driver
+from instrumentation import timed_serialization
+
+# Codificador JSON rápido si está instalado; si no, el json de la librería estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+# tipo -> función de conversión; se llena la primera vez que aparece cada tipo
+_converters = {t: None for t in _PRIMITIVES}
+
+
+def serialize(value):
+    """Convierte un valor devuelto por Neo4j a primitivas listas para JSON"""
+    try:
+        converter = _converters[type(value)]
+    except KeyError:
+        converter = _converters[type(value)] = _converter_for(type(value))
+    return value if converter is None else converter(value)
+
+
+def _convert_mapping(value):
+    return {key: serialize(item) for key, item in value.items()}
+
+
+def _convert_sequence(value):
+    return [serialize(item) for item in value]
+
+
+def _converter_for(value_type):
+    """Elige una sola vez cómo convertir cada tipo (dict, lista, nodo, fecha...)"""
+    if issubclass(value_type, (dict, Node, Relationship)):
+        return _convert_mapping
+    if issubclass(value_type, (list, tuple)):
+        return _convert_sequence
+    if issubclass(value_type, _PRIMITIVES):
+        return None
+    if hasattr(value_type, 'iso_format'):
+        # Date, DateTime, Time... de neo4j.time
+        return value_type.iso_format
+    if hasattr(value_type, 'to_native'):
+        return value_type.to_native
+    return None
+
+
+@timed_serialization
+def record_to_dict(record):
+    """Convierte un Record de Neo4j a diccionario en una sola pasada"""
+    return {key: serialize(value) for key, value in record.items()}
+
+
+@timed_serialization
+def dumps(data):
+    """Serializa a bytes JSON"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    """Equivalente a jsonify pero escribiendo directo a bytes"""
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+def wants_ndjson(request):
+    """True si el cliente pidió ?format=ndjson o Accept: application/x-ndjson"""
+    if request.args.get('format') == 'ndjson':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def ndjson_response(query, params=None):
+    """
+    Ejecuta la query y emite cada registro como una línea JSON conforme
+    el driver lo entrega, sin armar la lista completa en memoria.
+    """
+    driver = get_driver()
+
+    def generate():
+        try:
+            # Sesión de lectura: en un clúster la consulta va a un seguidor
+            with driver.session(default_access_mode=READ_ACCESS) as session:
+                for record in session.run(query, params):
+                    yield dumps(record_to_dict(record)) + b"\n"
+        except Exception as e:
+            # Los encabezados ya se enviaron: el error va como última línea
+            yield dumps({"error": str(e)}) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,100 @@
+from flask import g, has_request_context, jsonify, request
+from neo4j import Bookmarks
+
+# Header con el que el cliente recibe (después de escribir) y reenvía (al leer)
+# sus bookmarks, para leer sus propias escrituras aunque caiga en otro worker.
+BOOKMARKS_HEADER = 'X-Neo4j-Bookmarks'
+
+# Límites del header: cuántos bookmarks y de qué largo se aceptan
+MAX_CLIENT_BOOKMARKS = 16
+MAX_BOOKMARK_LENGTH = 512
+
+
+def _collect(tx, query, params, then=None):
+    """
+    Lee todos los registros dentro de la transacción y devuelve también el resumen.
+    'then(tx)', si se indica, corre después en la misma transacción.
+    """
+    result = tx.run(query, params)
+    records = list(result)
+    summary = result.consume()
+    if then is not None:
+        then(tx)
+    return records, summary
+
+
+def run_read(session, query, **params):
+    """
+    Ejecuta una lectura como función de transacción de solo lectura.
+    En un clúster el driver la envía a un seguidor y la reintenta ante errores
+    transitorios. Los bookmarks del proceso (y los que mandó el cliente)
+    garantizan que se vean las escrituras anteriores.
+    Devuelve (registros, resumen).
+    """
+    return session.execute_read(_collect, query, params)
+
+
+async def _collect_async(tx, query, params):
+    result = await tx.run(query, params)
+    records = [record async for record in result]
+    return records, await result.consume()
+
+
+async def run_read_async(session, query, **params):
+    """Versión asyncio de run_read, para las sesiones del driver asíncrono (asgi.py)"""
+    return await session.execute_read(_collect_async, query, params)
+
+
+def run_write(session, query, then=None, **params):
+    """
+    Ejecuta una sentencia de escritura como función de transacción administrada.
+    El driver la reintenta ante errores transitorios (p. ej. cambio de líder),
+    por eso las sentencias deben ser seguras de repetir.
+    'then(tx)' corre en la misma transacción después de la sentencia
+    (p. ej. versions.bump(...)): si falla, la escritura tampoco se confirma.
+    Devuelve (registros, resumen).
+    """
+    records, summary = session.execute_write(_collect, query, params, then)
+    if has_request_context():
+        g.bookmarks = session.last_bookmarks()
+    return records, summary
+
+
+def parse_bookmarks(raw):
+    """
+    Bookmarks del header (separados por comas). Lanza ValueError si no
+    parecen bookmarks: demasiados, demasiado largos o no ASCII.
+    """
+    values = [value.strip() for value in raw.split(',') if value.strip()]
+    if len(values) > MAX_CLIENT_BOOKMARKS:
+        raise ValueError(f"Máximo {MAX_CLIENT_BOOKMARKS} bookmarks en {BOOKMARKS_HEADER}")
+    if any(len(value) > MAX_BOOKMARK_LENGTH for value in values):
+        raise ValueError(f"Bookmark inválido en {BOOKMARKS_HEADER}")
+    try:
+        return Bookmarks.from_raw_values(values)
+    except ValueError:
+        raise ValueError(f"Bookmark inválido en {BOOKMARKS_HEADER}")
+
+
+def init_bookmarks(app):
+    """Intercambia bookmarks con el cliente por medio de BOOKMARKS_HEADER"""
+
+    @app.before_request
+    def load_client_bookmarks():
+        raw = request.headers.get(BOOKMARKS_HEADER)
+        if not raw:
+            return None
+        # Solo las sesiones de esta petición esperan esas escrituras (ver InstrumentedDriver):
+        # nunca se agregan al bookmark manager del proceso, así un header inválido
+        # solo afecta a la petición que lo trae
+        try:
+            g.client_bookmarks = parse_bookmarks(raw)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    @app.after_request
+    def send_bookmarks(response):
+        bookmarks = g.get('bookmarks')
+        if bookmarks:
+            response.headers[BOOKMARKS_HEADER] = ','.join(sorted(bookmarks.raw_values))
+        return response
@@ -0,0 +1,216 @@
+# versions.py
+# Versión de cambios por tipo de recurso, para GET condicionales (ETag / Last-Modified).
+#
+# Los handlers de escritura pasan bump(...) con los recursos que cambiaron y las rutas
+# GET declaran con @conditional(...) de cuáles dependen. Si ninguna de esas versiones
+# cambió desde la ETag que manda el cliente (If-None-Match), se responde 304 sin ejecutar
+# la consulta.
+#
+# Las versiones se guardan en la base, un nodo (:ChangeVersion {resource}) por recurso,
+# así todos los workers ven las escrituras de los demás. bump() las incrementa dentro
+# de la misma transacción que la escritura (run_write(..., then=bump(...))).
+#
+# Cada worker guarda en memoria la última lectura de esos nodos. Solo las peticiones que
+# revalidan (If-None-Match / If-Modified-Since) la refrescan, y solo si tiene más de
+# CHANGE_VERSION_CACHE_TTL segundos: una escritura en otro worker puede tardar eso en
+# producir 200 en lugar de 304. Las demás respuestas llevan validadores calculados con
+# lo que haya en memoria, sin ir a la base (versiones viejas solo hacen que la próxima
+# revalidación responda 200).
+#
+# Los cambios que no pasan por la API (loader.py, related.py, scripts de Cypher) no
+# incrementan nada: por eso una ETag además solo vale durante CHANGE_VERSION_TTL segundos.
+# Las peticiones que traen bookmarks (el cliente acaba de escribir) siempre van a la base.
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+from cache import read_flights
+from extensions import get_driver
+from transactions import BOOKMARKS_HEADER, run_read
+
+RESOURCES = ('usuarios', 'tags', 'categorias', 'articulos', 'comentarios')
+
+# Segundos durante los que una ETag puede producir 304
+VERSION_TTL = float(os.environ.get('CHANGE_VERSION_TTL', 60))
+
+# Segundos que un worker usa las versiones leídas para decidir un 304 sin volver a leerlas
+SNAPSHOT_TTL = float(os.environ.get('CHANGE_VERSION_CACHE_TTL', 1))
+
+# Lo que aparece dentro de un artículo: su autor, sus tags y sus categorías
+ARTICULO_RESOURCES = ('articulos', 'usuarios', 'tags', 'categorias')
+
+BUMP_QUERY = """
+UNWIND $resources AS resource
+MERGE (v:ChangeVersion {resource: resource})
+SET v.version = coalesce(v.version, 0) + 1,
+    v.changedAt = datetime()
+"""
+
+# changed_at va en segundos desde 1970; 0 si el recurso nunca cambió
+VERSIONS_QUERY = """
+UNWIND $resources AS resource
+OPTIONAL MATCH (v:ChangeVersion {resource: resource})
+RETURN resource,
+       coalesce(v.version, 0) AS version,
+       coalesce(v.changedAt.epochMillis, 0) / 1000.0 AS changed_at
+"""
+
+
+_lock = threading.Lock()
+# Última lectura de la base: {recurso: (versión, changed_at)} y cuándo empezó
+_snapshot = {}
+_loaded_at = None
+# Último bump hecho por este worker: las lecturas que empezaron antes ya no sirven
+_bumped_at = 0.0
+
+
+def bump(*resources):
+    """
+    Función de transacción que registra que los recursos cambiaron.
+    Se pasa a run_write(..., then=bump(...)): corre en la misma transacción que la
+    escritura, así no hay escrituras confirmadas sin su versión (ni al revés).
+    """
+    def then(tx):
+        global _bumped_at
+        tx.run(BUMP_QUERY, resources=list(resources)).consume()
+        with _lock:
+            _bumped_at = time.monotonic()
+    return then
+
+
+def _load():
+    """{recurso: (versión, changed_at)} de todos los recursos, leído de la base"""
+    with get_driver().session() as session:
+        records, _ = run_read(session, VERSIONS_QUERY, resources=list(RESOURCES))
+    return {record["resource"]: (record["version"], record["changed_at"]) for record in records}
+
+
+def _refresh():
+    global _snapshot, _loaded_at
+    loaded_at = time.monotonic()
+    versions = _load()
+    with _lock:
+        _snapshot = versions
+        _loaded_at = loaded_at
+    return versions
+
+
+def current_versions():
+    """
+    Versiones leídas hace menos de SNAPSHOT_TTL segundos (y después del último bump
+    de este worker). Las peticiones que llegan juntas cuando hay que leerlas de nuevo
+    comparten una sola consulta (read_flights).
+    """
+    with _lock:
+        if (_loaded_at is not None and _loaded_at > _bumped_at
+                and time.monotonic() - _loaded_at < SNAPSHOT_TTL):
+            return _snapshot
+    return read_flights.do('versions', _refresh)
+
+
+def remembered_versions():
+    """Las últimas versiones leídas por este worker, sin ir a la base (None si nunca leyó)"""
+    with _lock:
+        return _snapshot or None
+
+
+def stats():
+    return {resource: {"version": version, "changed_at": changed_at}
+            for resource, (version, changed_at) in _load().items()}
+
+
+def _validators(resources, loaded):
+    """(ETag, Last-Modified) de la petición actual según las versiones 'loaded' de 'resources'"""
+    now = time.time()
+    window = int(now // VERSION_TTL)
+    # changed_at va en la ETag: si se borran los nodos la versión vuelve a 0 pero no la fecha
+    versions = [loaded[resource] for resource in resources]
+    changed_at = max(changed for _, changed in versions)
+
+    # La misma URL con otro Accept (p. ej. NDJSON) u otro Accept-Encoding (ver compression.py)
+    # es otra representación
+    headers = f"{request.headers.get('Accept', '')}:{request.headers.get('Accept-Encoding', '')}"
+    raw = f"{window}:{versions}:{request.full_path}:{headers}"
+    etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    # Last-Modified también avanza con la ventana, para acotar lo que vale If-Modified-Since.
+    # Si el último cambio fue en este mismo segundo no se envía: un cambio posterior
+    # en ese segundo tendría la misma fecha (el header no tiene fracciones).
+    last_modified = int(max(changed_at, window * VERSION_TTL))
+    if last_modified >= int(now):
+        last_modified = None
+    return etag, last_modified
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since.timestamp()
+    return False
+
+
+def _revalidating():
+    """True si el cliente manda validadores y no acaba de escribir (sin bookmarks)"""
+    if BOOKMARKS_HEADER in request.headers:
+        return False
+    return bool(request.if_none_match) or request.if_modified_since is not None
+
+
+def conditional(*resources):
+    """
+    Decorador para endpoints GET que dependen de 'resources'.
+    Agrega ETag y Last-Modified a las respuestas 200 y responde 304 sin llamar
+    al handler si el cliente ya tiene la versión vigente. Va antes que @cached_response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Las versiones se toman antes de leer: si alguien escribe durante la consulta,
+            # la ETag entregada ya es vieja y la próxima petición trae los datos nuevos.
+            revalidating = _revalidating()
+            if revalidating:
+                # Si la base no responde se atiende sin validadores (y el handler informa el error)
+                try:
+                    loaded = current_versions()
+                except Exception:
+                    loaded = None
+            else:
+                loaded = remembered_versions()
+            validators = _validators(resources, loaded) if loaded else None
+
+            if revalidating and validators and _not_modified(*validators):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Copia de cached_response: se guardó con versiones que quizá ya no son
+                # las de la memoria, y una ETag más nueva que los datos daría 304
+                # para datos viejos hasta el próximo cambio
+                if g.get('cached_copy'):
+                    return response
+                if validators is None:
+                    # Primera respuesta del worker: unas versiones leídas después de los
+                    # datos podrían ser más nuevas que ellos, así que esta va sin
+                    # validadores y se leen para las siguientes
+                    if not revalidating:
+                        try:
+                            current_versions()
+                        except Exception:
+                            pass
+                    return response
+
+            etag, last_modified = validators
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # El navegador guarda la copia pero la revalida en cada uso
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator